@@ -1,61 +1,183 @@
 """Text Chunking - Splits cleaned text into semantic chunks for vector DB."""
 
+import os
 import re
 import sys
-import json
-import hashlib
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from dataclasses import dataclass, asdict, field
-from typing import Optional, List, Dict, Set
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Set, Tuple, Iterable, Iterator
+import ahocorasick
+import orjson
 import tiktoken
+import xxhash
 
 # Chunk configuration
 TARGET_TOKENS = 400
 MAX_TOKENS = 600
 MIN_TOKENS = 80
-
-# Jungian concepts for tagging
+INDEX_SKIP_STRIDE = 10  # Paragraphs probed ahead per step inside an index run
+# Chunking runs in CHUNK_WORKERS processes, each batch-encoding on TOKENIZER_THREADS
+# threads; together they use each core once instead of cores x cores threads
+CHUNK_WORKERS = max(1, (os.cpu_count() or 1) // 2)
+TOKENIZER_THREADS = max(1, (os.cpu_count() or 1) // CHUNK_WORKERS)
+
+# Packing uses a per-file chars->tokens estimate; exact counts are taken per chunk
+CALIBRATION_PARAGRAPHS = 20
+ESTIMATE_MARGIN = 0.9  # Pack against 90% of the limits to absorb estimate error
+
+# Jungian concepts for tagging: concept -> keywords, matched case-insensitively.
+# A leading/trailing \b marks a word boundary on that side of the keyword, and \s+
+# matches a run of whitespace; any other space must be a literal space.
 JUNGIAN_CONCEPTS = {
-    "anima": r"\banima\b",
-    "animus": r"\banimus\b",
-    "shadow": r"\bshadow\b",
-    "self": r"\bSelf\b",  # Capital S for Jungian Self
-    "ego": r"\bego\b",
-    "individuation": r"\bindividuation\b",
-    "archetype": r"\barchetype",
-    "collective_unconscious": r"collective unconscious",
-    "personal_unconscious": r"personal unconscious",
-    "complex": r"\bcomplex(es)?\b",
-    "persona": r"\bpersona\b",
-    "synchronicity": r"\bsynchronicity\b",
-    "mandala": r"\bmandala",
-    "quaternity": r"\bquaternity\b",
-    "coniunctio": r"\bconiunctio\b",
-    "projection": r"\bprojection\b",
-    "transference": r"\btransference\b",
-    "libido": r"\blibido\b",
-    "introversion": r"\bintroversion\b",
-    "extraversion": r"\bextraversion\b",
-    "feeling": r"\bfeeling\s+(function|type)",
-    "thinking": r"\bthinking\s+(function|type)",
-    "sensation": r"\bsensation\s+(function|type)",
-    "intuition": r"\bintuition\s+(function|type)",
-    "alchemy": r"\balchem",
-    "dream": r"\bdream(s|ing)?\b",
-    "symbol": r"\bsymbol",
-    "myth": r"\bmyth",
-    "religion": r"\breligion|\breligious\b",
-    "god_image": r"\bgod[- ]image|imago dei\b",
-    "transformation": r"\btransformation\b",
-    "rebirth": r"\brebirth\b",
-    "mother": r"\b(mother|maternal)\s*(archetype|complex|image)?",
-    "father": r"\b(father|paternal)\s*(archetype|complex|image)?",
-    "child": r"\bchild\s*(archetype)?|puer|divine child",
-    "wise_old_man": r"wise old man|senex",
-    "trickster": r"\btrickster\b",
-    "hero": r"\bhero\s*(archetype|myth|journey)?",
+    "anima": [r"\banima\b"],
+    "animus": [r"\banimus\b"],
+    "shadow": [r"\bshadow\b"],
+    "self": [r"\bself\b"],  # Jungian Self
+    "ego": [r"\bego\b"],
+    "individuation": [r"\bindividuation\b"],
+    "archetype": [r"\barchetype"],
+    "collective_unconscious": ["collective unconscious"],
+    "personal_unconscious": ["personal unconscious"],
+    "complex": [r"\bcomplex\b", r"\bcomplexes\b"],
+    "persona": [r"\bpersona\b"],
+    "synchronicity": [r"\bsynchronicity\b"],
+    "mandala": [r"\bmandala"],
+    "quaternity": [r"\bquaternity\b"],
+    "coniunctio": [r"\bconiunctio\b"],
+    "projection": [r"\bprojection\b"],
+    "transference": [r"\btransference\b"],
+    "libido": [r"\blibido\b"],
+    "introversion": [r"\bintroversion\b"],
+    "extraversion": [r"\bextraversion\b"],
+    "feeling": [r"\bfeeling\s+function", r"\bfeeling\s+type"],
+    "thinking": [r"\bthinking\s+function", r"\bthinking\s+type"],
+    "sensation": [r"\bsensation\s+function", r"\bsensation\s+type"],
+    "intuition": [r"\bintuition\s+function", r"\bintuition\s+type"],
+    "alchemy": [r"\balchem"],
+    "dream": [r"\bdream\b", r"\bdreams\b", r"\bdreaming\b"],
+    "symbol": [r"\bsymbol"],
+    "myth": [r"\bmyth"],
+    "religion": [r"\breligion", r"\breligious\b"],
+    "god_image": [r"\bgod-image", r"\bgod image", r"imago dei\b"],
+    "transformation": [r"\btransformation\b"],
+    "rebirth": [r"\brebirth\b"],
+    "mother": [r"\bmother", r"\bmaternal"],
+    "father": [r"\bfather", r"\bpaternal"],
+    "child": [r"\bchild", "puer", "divine child"],
+    "wise_old_man": ["wise old man", "senex"],
+    "trickster": [r"\btrickster\b"],
+    "hero": [r"\bhero"],
+}
+
+# Letters that re.IGNORECASE also matches to i, s and k but lower() leaves alone
+# (or, for the dotted capital I, lengthens); folded before lowercasing
+_CONCEPT_FOLD = str.maketrans("\u0130\u0131\u017f\u212a", "iisk")
+
+
+def _build_concept_automaton() -> ahocorasick.Automaton:
+    """Build one Aho-Corasick automaton over every concept keyword.
+
+    A keyword with a whitespace run is added as its first word, carrying the
+    words that may follow the run; those are checked at each hit.
+    """
+    entries = {}
+    for concept, keywords in JUNGIAN_CONCEPTS.items():
+        for keyword in keywords:
+            literal = keyword.removeprefix(r"\b").removesuffix(r"\b")
+            head, _, tail = literal.partition(r"\s+")
+            tails = entries[head][4] if head in entries else ()
+            entries[head] = (
+                concept, len(head), keyword.startswith(r"\b"), keyword.endswith(r"\b"),
+                tails + (tail,) if tail else tails,
+            )
+    automaton = ahocorasick.Automaton()
+    for head, entry in entries.items():
+        automaton.add_word(head, entry)
+    automaton.make_automaton()
+    return automaton
+
+
+_CONCEPT_AUTOMATON = _build_concept_automaton()
+
+# Filename metadata patterns
+_YEAR_RE = re.compile(r"\((\d{4})\)")
+_CW_VOLUME_RE = re.compile(r"Volume\s*(\d+)", re.IGNORECASE)
+_LEADING_PAREN_RE = re.compile(r"^\([^)]+\)\s*")
+_PUBLISHER_SUFFIX_RE = re.compile(r"\s*-\s*(Princeton|Routledge|Norton|Vintage).*$", re.IGNORECASE)
+_TRAILING_YEAR_RE = re.compile(r"\s*\(\d{4}\)\s*$")
+_HAS_YEAR_RE = re.compile(r"\(\d{4}")
+_SPACES_RE = re.compile(r"\s+")
+
+# Standard patterns for seminars, CW, etc.
+# All standard headings share one shape, so a single alternation covers them;
+# "Seminar" is the only keyword restricted to arabic numerals.
+_STANDARD_RE = re.compile(
+    r"^(?P<keyword>CHAPTER|Chapter|PART|Part|SECTION|Section|LECTURE|Lecture|(?P<seminar>Seminar))"
+    r"\s+(?P<number>(?(seminar)\d+|[IVXLCDM\d]+))[\s:.]*(?P<title>.*)$"
+)
+
+_STANDARD_TYPES = {
+    "CHAPTER": "Chapter", "Chapter": "Chapter",
+    "PART": "Part", "Part": "Part",
+    "SECTION": "Section", "Section": "Section",
+    "LECTURE": "Lecture", "Lecture": "Lecture",
+    "Seminar": "Seminar",
 }
 
+_STANDARD_FIRST_CHARS = "CPSL"
+
+# Date patterns for letters/correspondence
+_MONTHS = r"(?:January|February|March|April|May|June|July|August|September|October|November|December)"
+_DATE_RE = re.compile(
+    r"^(?:\d{1,2}\s+" + _MONTHS + r"\s+\d{4}"
+    r"|" + _MONTHS + r"\s+\d{1,2},?\s+\d{4}"
+    r"|To\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s*)$"  # "To Sigmund Freud"
+)
+
+_DATE_FIRST_CHARS = "JFMASONDT"  # Month names and "To"; day numbers are checked separately
+
+# MDR chapter titles (whole-line, case-insensitive)
+_MDR_TITLES = frozenset(title.lower() for title in [
+    "Prologue", "First Years", "School Years", "Student Years", "Psychiatric Activities",
+    "Sigmund Freud", "Confrontation with the Unconscious", "The Work", "The Tower",
+    "Travels", "Visions", "On Life after Death", "Late Thoughts", "Retrospect",
+])
+
+# CW essay title patterns (ALL CAPS titles)
+_CW_PATTERNS = [
+    (re.compile(r"^([A-Z][A-Z\s]{10,60})$"), "Essay"),  # All caps title
+]
+
+# Line prefixes that can begin any of the markers above, for a single pre-scan.
+# The scan anchors on "\n" rather than (?m)^ so the engine can jump between newlines.
+_MARKER_PREFIX = (
+    r"[^\S\n]*(?:"
+    r"CHAPTER|Chapter|PART|Part|SECTION|Section|LECTURE|Lecture|Seminar"
+    r"|\d|January|February|March|April|May|June|July|August|September|October|November|December|To"
+    r"|(?i:" + "|".join(re.escape(title) for title in sorted(_MDR_TITLES)) + r")"
+    r"|[A-Z](?:[A-Z]|[^\S\n]){10}"
+    r")"
+)
+_MARKER_FIRST_LINE_RE = re.compile(_MARKER_PREFIX + r".*")
+_MARKER_CANDIDATE_RE = re.compile(r"\n(" + _MARKER_PREFIX + r".*)")  # Group 1 is the whole line
+
+# Index page references ("anima, 12, 45-47")
+_INDEX_REF_RE = re.compile(r",\s*\d{1,4}(?:\s*-\s*\d{1,4})?")
+
+# Sentence splitting
+_ABBR_RE = re.compile(
+    r"\b(Dr|Mr|Mrs|Ms|Prof|Jr|Sr|vs|etc|i\.e|e\.g|vol|Vol|par|pars|cf|Cf)\.\s+"  # Titles, "e.g."
+    r"|\b([A-Z])\.\s+([A-Z])\.\s+"  # Initials: "C. G."
+    r"|\b(CW|cw)\s+(\d)"  # Volume references: "CW 9"
+)
+_ABBR_DOT = "\x01"  # Stands in for abbreviation dots while splitting
+_UNMASK_ABBR = str.maketrans(_ABBR_DOT, ".")
+_SENT_SPLIT_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z"\'])')
+_PARA_SPLIT_RE = re.compile(r"\n\s*\n")
+
 
 @dataclass
 class Chunk:
@@ -76,22 +198,43 @@ class Chunk:
     concepts: List[str] = field(default_factory=list)
 
 
+def chunk_to_dict(chunk: Chunk) -> Dict:
+    """Shallow dict copy of a chunk; its fields are flat, so asdict's deep copy is not needed."""
+    return dict(vars(chunk))
+
+
+@lru_cache(maxsize=1)
 def get_tokenizer():
+    """Load the cl100k_base encoding once per process."""
     return tiktoken.get_encoding("cl100k_base")
 
 
 def count_tokens(text: str, tokenizer) -> int:
-    return len(tokenizer.encode(text))
+    return len(tokenizer.encode_ordinary(text))
+
+
+def count_tokens_batch(texts: List[str], tokenizer) -> List[int]:
+    """Count tokens for many texts in one call (tiktoken encodes them in parallel)."""
+    return [len(tokens) for tokens in tokenizer.encode_ordinary_batch(texts, num_threads=TOKENIZER_THREADS)]
+
+
+def calibrate_tokens_per_char(paragraphs: List[str], tokenizer) -> float:
+    """Measure the tokens/char ratio on the first few paragraphs of a file."""
+    sample = paragraphs[:CALIBRATION_PARAGRAPHS]
+    chars = sum(len(p) for p in sample)
+    if not chars:
+        return 0.25
+    return sum(count_tokens_batch(sample, tokenizer)) / chars
 
 
 def extract_work_metadata(filename: str) -> Dict:
     """Extract metadata from filename (title, year, CW volume)."""
     name = Path(filename).stem
 
-    year_matches = re.findall(r"\((\d{4})\)", name)
+    year_matches = _YEAR_RE.findall(name)
     year = year_matches[-1] if year_matches else None
 
-    cw_match = re.search(r"Volume\s*(\d+)", name, re.IGNORECASE)
+    cw_match = _CW_VOLUME_RE.search(name)
     cw_volume = cw_match.group(1) if cw_match else None
 
     title_map = {
@@ -137,16 +280,16 @@ def extract_work_metadata(filename: str) -> Dict:
 
     if not title:
         title = name
-        title = re.sub(r"^\([^)]+\)\s*", "", title)
+        title = _LEADING_PAREN_RE.sub("", title)
         if " - " in title:
             parts = title.split(" - ")
             title = parts[1] if len(parts) >= 2 else title
         title = title.replace("_", " ")
-        title = re.sub(r"\s*-\s*(Princeton|Routledge|Norton|Vintage).*$", "", title, flags=re.IGNORECASE)
-        title = re.sub(r"\s*\(\d{4}\)\s*$", "", title)
-        title = re.sub(r"\s+", " ", title).strip()
+        title = _PUBLISHER_SUFFIX_RE.sub("", title)
+        title = _TRAILING_YEAR_RE.sub("", title)
+        title = _SPACES_RE.sub(" ", title).strip()
 
-    if year and not re.search(r"\(\d{4}", title):
+    if year and not _HAS_YEAR_RE.search(title):
         title = f"{title} ({year})"
 
     return {"title": title.strip(), "year": year, "cw_volume": cw_volume}
@@ -156,82 +299,62 @@ def find_chapter_markers(text: str, source_file: str) -> List[Dict]:
     """Find chapter/section boundaries in text with source-aware patterns."""
     markers = []
 
-    # Standard patterns for seminars, CW, etc.
-    standard_patterns = [
-        (r"^(CHAPTER|Chapter)\s+([IVXLCDM\d]+)[\s:.]*(.*)$", "Chapter"),
-        (r"^(PART|Part)\s+([IVXLCDM\d]+)[\s:.]*(.*)$", "Part"),
-        (r"^(SECTION|Section)\s+([IVXLCDM\d]+)[\s:.]*(.*)$", "Section"),
-        (r"^(LECTURE|Lecture)\s+([IVXLCDM\d]+)[\s:.]*(.*)$", "Lecture"),
-        (r"^(Seminar)\s+(\d+)[\s:.]*(.*)$", "Seminar"),
-    ]
-
-    # Date patterns for letters/correspondence
-    date_patterns = [
-        (r"^(\d{1,2})\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})$", "Letter"),
-        (r"^(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})$", "Letter"),
-        (r"^To\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s*$", "Letter"),  # "To Sigmund Freud"
-    ]
-
-    # MDR chapter patterns
-    mdr_patterns = [
-        (r"^(Prologue|First Years|School Years|Student Years|Psychiatric Activities|Sigmund Freud|Confrontation with the Unconscious|The Work|The Tower|Travels|Visions|On Life after Death|Late Thoughts|Retrospect)$", "Chapter"),
-    ]
-
-    # CW essay title patterns (ALL CAPS titles)
-    cw_patterns = [
-        (r"^([A-Z][A-Z\s]{10,60})$", "Essay"),  # All caps title
-    ]
-
     is_letters = "letters" in source_file.lower() or "correspondence" in source_file.lower()
     is_mdr = "memories" in source_file.lower() and "dreams" in source_file.lower()
     is_cw = "collected works" in source_file.lower() or "C.G.Jung -" in source_file
 
-    char_pos = 0
-    for line in text.split("\n"):
+    # One scan over the whole text finds the lines that could start a marker;
+    # only those are checked against the individual pattern families below.
+    # Each match spans its whole line, so no line list or end lookup is needed.
+    first_line = _MARKER_FIRST_LINE_RE.match(text)
+    candidates = [(0, first_line.group())] if first_line else []
+    candidates.extend(
+        (candidate.start(1), candidate.group(1)) for candidate in _MARKER_CANDIDATE_RE.finditer(text)
+    )
+
+    for char_pos, line in candidates:
         stripped = line.strip()
+        first = stripped[0]
 
         # Try standard patterns
-        for pattern, marker_type in standard_patterns:
-            match = re.match(pattern, stripped)
+        if first in _STANDARD_FIRST_CHARS:
+            match = _STANDARD_RE.match(stripped)
             if match:
                 markers.append({
                     "char_index": char_pos,
-                    "type": marker_type,
-                    "number": match.group(2) if len(match.groups()) >= 2 else "",
-                    "title": match.group(3).strip() if len(match.groups()) >= 3 else "",
+                    "type": _STANDARD_TYPES[match.group("keyword")],
+                    "number": match.group("number"),
+                    "title": match.group("title").strip(),
                 })
-                break
 
         # Try date patterns for letters
-        if is_letters and not markers or (markers and markers[-1]["char_index"] != char_pos):
-            for pattern, marker_type in date_patterns:
-                match = re.match(pattern, stripped)
-                if match:
-                    markers.append({
-                        "char_index": char_pos,
-                        "type": marker_type,
-                        "number": "",
-                        "title": stripped,
-                    })
-                    break
+        if (first.isdigit() or first in _DATE_FIRST_CHARS) and (
+            is_letters and not markers or (markers and markers[-1]["char_index"] != char_pos)
+        ):
+            if _DATE_RE.match(stripped):
+                markers.append({
+                    "char_index": char_pos,
+                    "type": "Letter",
+                    "number": "",
+                    "title": stripped,
+                })
 
         # Try MDR patterns
         if is_mdr and not markers or (markers and markers[-1]["char_index"] != char_pos):
-            for pattern, marker_type in mdr_patterns:
-                match = re.match(pattern, stripped, re.IGNORECASE)
-                if match:
-                    markers.append({
-                        "char_index": char_pos,
-                        "type": marker_type,
-                        "number": "",
-                        "title": match.group(1),
-                    })
-                    break
+            if stripped.lower() in _MDR_TITLES:
+                markers.append({
+                    "char_index": char_pos,
+                    "type": "Chapter",
+                    "number": "",
+                    "title": stripped,
+                })
 
-        # Try CW essay patterns
-        if is_cw and len(stripped) > 10 and not markers or (markers and markers[-1]["char_index"] != char_pos):
-            for pattern, marker_type in cw_patterns:
-                match = re.match(pattern, stripped)
+        # Try CW essay patterns (11-61 chars of capitals and spaces)
+        if 10 < len(stripped) < 62 and stripped.isupper() and (
+            is_cw and len(stripped) > 10 and not markers or (markers and markers[-1]["char_index"] != char_pos)
+        ):
+            for pattern, marker_type in _CW_PATTERNS:
+                match = pattern.match(stripped)
                 if match and not any(skip in stripped for skip in ["CHAPTER", "PART", "SECTION", "LECTURE"]):
                     markers.append({
                         "char_index": char_pos,
@@ -241,41 +364,124 @@ def find_chapter_markers(text: str, source_file: str) -> List[Dict]:
                     })
                     break
 
-        char_pos += len(line) + 1
-
     return markers
 
 
 def is_index_content(text: str) -> bool:
     """Check if text looks like index content."""
-    page_refs = len(re.findall(r",\s*\d{1,4}(?:\s*-\s*\d{1,4})?", text))
-    words = len(text.split())
+    # Cleaned text is single-spaced, so separators give the word count without splitting
+    words = text.count(" ") + text.count("\n") + 1
     if words < 10:
         return False
-    return page_refs > words * 0.15
+    # Every page reference needs a comma; prose rarely has enough to qualify
+    threshold = words * 0.15
+    if text.count(",") <= threshold:
+        return False
+    return len(_INDEX_REF_RE.findall(text)) > threshold
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _concept_matches(text_lower: str) -> Iterator[Tuple[int, int, str]]:
+    """Yield (start, end, concept) for every keyword in folded, lowercased text (end inclusive)."""
+    last = len(text_lower) - 1
+    for end, (concept, length, left_bound, right_bound, tails) in _CONCEPT_AUTOMATON.iter(text_lower):
+        start = end - length + 1
+        if left_bound and start > 0 and _is_word_char(text_lower[start - 1]):
+            continue
+        if tails:
+            # A run of whitespace, then one of the words that may follow it
+            pos = end + 1
+            while pos <= last and text_lower[pos].isspace():
+                pos += 1
+            tail = next((tail for tail in tails if text_lower.startswith(tail, pos)), None) if pos > end + 1 else None
+            if tail is None:
+                continue
+            end = pos + len(tail) - 1
+        if right_bound and end < last and _is_word_char(text_lower[end + 1]):
+            continue
+        yield start, end, concept
 
 
 def detect_concepts(text: str) -> List[str]:
-    """Detect Jungian concepts in text."""
-    concepts = []
-    text_lower = text.lower()
-    for concept, pattern in JUNGIAN_CONCEPTS.items():
-        if re.search(pattern, text, re.IGNORECASE):
-            concepts.append(concept)
-    return concepts
+    """Detect Jungian concepts in text with a single automaton pass."""
+    found = {concept for _, _, concept in _concept_matches(text.translate(_CONCEPT_FOLD).lower())}
+    return [concept for concept in JUNGIAN_CONCEPTS if concept in found]
+
+
+def find_concept_hits(text: str) -> Optional[Tuple[List[int], List[int], List[str]]]:
+    """Locate every concept keyword in text as parallel (starts, ends, concepts) lists.
+
+    Hits come back ordered by end offset. Returns None when lowercasing changes
+    the text length, since offsets would no longer line up with the original.
+    """
+    text_lower = text.translate(_CONCEPT_FOLD).lower()
+    if len(text_lower) != len(text):
+        return None
+    # Hits whose keyword continues past a whitespace run end later than reported
+    hits = sorted(_concept_matches(text_lower), key=lambda hit: hit[1])
+    starts = [start for start, _, _ in hits]
+    ends = [end for _, end, _ in hits]
+    concepts = [concept for _, _, concept in hits]
+    return starts, ends, concepts
+
+
+def concepts_between(hits: Tuple[List[int], List[int], List[str]], start: int, end: int) -> Set[str]:
+    """Concepts from find_concept_hits() lying entirely within text[start:end]."""
+    starts, ends, concepts = hits
+    found = set()
+    for i in range(bisect_left(ends, start), bisect_left(ends, end)):
+        if starts[i] >= start:
+            found.add(concepts[i])
+    return found
+
+
+def _mask_abbreviation(match: re.Match) -> str:
+    if match.group(1):
+        return f"{match.group(1)}{_ABBR_DOT} "
+    if match.group(2):
+        return f"{match.group(2)}{_ABBR_DOT} {match.group(3)}{_ABBR_DOT} "
+    return f"{match.group(4)}{_ABBR_DOT}{match.group(5)}"
+
+
+def split_sentence_spans(text: str) -> List[Tuple[str, int, int]]:
+    """Split text into (sentence, start, end), with offsets of each sentence into text."""
+    # Find split points with only the abbreviation dots masked, so offsets match text
+    masked = _ABBR_RE.sub(lambda match: match.group().replace(".", _ABBR_DOT), text)
+
+    sentences = []
+    start = 0
+    gaps = [(gap.start(), gap.end()) for gap in _SENT_SPLIT_RE.finditer(masked)]
+    for end, next_start in gaps + [(len(text), len(text))]:
+        raw = text[start:end]
+        sentence = _ABBR_RE.sub(_mask_abbreviation, raw).translate(_UNMASK_ABBR).strip()
+        if sentence:
+            sent_start = start + len(raw) - len(raw.lstrip())
+            sentences.append((sentence, sent_start, start + len(raw.rstrip())))
+        start = next_start
+    return sentences
 
 
 def split_into_sentences(text: str) -> List[str]:
     """Split text into sentences, preserving sentence integrity."""
-    text = re.sub(r'\b(Dr|Mr|Mrs|Ms|Prof|Jr|Sr|vs|etc|i\.e|e\.g|vol|Vol|par|pars|cf|Cf)\.\s+', r'\1<ABBR> ', text)
-    text = re.sub(r'\b([A-Z])\.\s+([A-Z])\.\s+', r'\1<ABBR> \2<ABBR> ', text)
-    text = re.sub(r'\b(CW|cw)\s+(\d)', r'\1<ABBR>\2', text)
+    return [sentence for sentence, _, _ in split_sentence_spans(text)]
 
-    sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z"\'])', text)
-    sentences = [s.replace('<ABBR>', '.') for s in sentences]
-    sentences = [s.strip() for s in sentences if s.strip()]
 
-    return sentences
+def split_paragraphs(text: str) -> List[Tuple[str, int, int]]:
+    """Split text at blank lines into (paragraph, start, end) with offsets into text."""
+    paragraphs = []
+    start = 0
+    gaps = [(gap.start(), gap.end()) for gap in _PARA_SPLIT_RE.finditer(text)]
+    for end, next_start in gaps + [(len(text), len(text))]:
+        raw = text[start:end]
+        para = raw.strip()
+        if para:
+            para_start = start + len(raw) - len(raw.lstrip())
+            paragraphs.append((para, para_start, para_start + len(para)))
+        start = next_start
+    return paragraphs
 
 
 def create_chunks(text: str, source_file: str) -> List[Chunk]:
@@ -284,41 +490,69 @@ def create_chunks(text: str, source_file: str) -> List[Chunk]:
     metadata = extract_work_metadata(source_file)
     chapter_markers = find_chapter_markers(text, source_file)
 
+    # Markers are in text order; format each label once and binary-search by offset
+    marker_positions = [marker["char_index"] for marker in chapter_markers]
+    marker_labels = []
+    for marker in chapter_markers:
+        title_part = f": {marker['title']}" if marker['title'] else ""
+        number_part = f" {marker['number']}" if marker['number'] else ""
+        marker_labels.append(f"{marker['type']}{number_part}{title_part}")
+
     def get_chapter_at(pos: int) -> Optional[str]:
-        for marker in reversed(chapter_markers):
-            if marker["char_index"] <= pos:
-                title_part = f": {marker['title']}" if marker['title'] else ""
-                number_part = f" {marker['number']}" if marker['number'] else ""
-                return f"{marker['type']}{number_part}{title_part}"
-        return None
+        idx = bisect_right(marker_positions, pos) - 1
+        return marker_labels[idx] if idx >= 0 else None
 
     chunks = []
-    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+    paragraphs = split_paragraphs(text)
 
-    current_paragraphs = []  # List of (paragraph_text, sentences) tuples
+    current_paragraphs = []  # List of (sentences, start, end, whole_paragraph) tuples
     current_tokens = 0
     current_chapter = None
-    chunk_start_char = 0
-    char_position = 0
+    keep_next_short = False  # Set by an index run, whose neighbours are kept even if short
+
+    # The source file name starts every chunk ID, so hash it once and copy per chunk
+    id_prefix_hasher = xxhash.xxh3_64(source_file.encode())
+
+    # One automaton pass over the whole file; chunks pick their concepts out of it
+    concept_hits = find_concept_hits(text)
 
-    def save_chunk(para_list: List[tuple], start: int, end: int):
+    def save_chunk(para_list: List[tuple], keep_short: bool = False):
+        nonlocal keep_next_short
         if not para_list:
             return
 
         # Join paragraphs with \n\n, sentences within paragraphs with space
         content_parts = []
-        for para_text, sentences in para_list:
+        for sentences, _, _, _ in para_list:
             content_parts.append(" ".join(sentences))
         content = "\n\n".join(content_parts)
 
         tokens = count_tokens(content, tokenizer)
-        if tokens < MIN_TOKENS and chunks:
+        if tokens < MIN_TOKENS and chunks and not (keep_short or keep_next_short):
             return
+        keep_next_short = False
 
-        chunk_id = hashlib.md5(f"{source_file}:{start}:{end}:{len(chunks)}".encode()).hexdigest()[:16]
+        # Pieces are contiguous in the source, so text[start:end] is exactly what the
+        # chunk was built from (its spacing between sentences and paragraphs normalized)
+        start = para_list[0][1]
+        end = para_list[-1][2]
 
-        # Detect concepts in this chunk
-        concepts = detect_concepts(content)
+        id_hasher = id_prefix_hasher.copy()
+        id_hasher.update(f":{start}:{end}:{len(chunks)}".encode())
+        chunk_id = id_hasher.hexdigest()
+
+        # Detect concepts in this chunk. Whole paragraphs reuse the file-wide
+        # hits; only partial paragraphs need their sentences scanned.
+        if concept_hits is None:
+            concepts = detect_concepts(content)
+        else:
+            found = set()
+            for sentences, piece_start, piece_end, whole in para_list:
+                if whole:
+                    found.update(concepts_between(concept_hits, piece_start, piece_end))
+                else:
+                    found.update(detect_concepts(" ".join(sentences)))
+            concepts = [concept for concept in JUNGIAN_CONCEPTS if concept in found]
 
         chunks.append(Chunk(
             id=chunk_id,
@@ -335,76 +569,104 @@ def create_chunks(text: str, source_file: str) -> List[Chunk]:
             concepts=concepts,
         ))
 
-    for para in paragraphs:
-        para_start = text.find(para, char_position)
-        if para_start == -1:
-            para_start = char_position
-        para_end = para_start + len(para)
-
-        # Skip index-like content
+    tokens_per_char = calibrate_tokens_per_char(
+        [para for para, _, _ in paragraphs[:CALIBRATION_PARAGRAPHS]], tokenizer
+    )
+    target_tokens = TARGET_TOKENS * ESTIMATE_MARGIN
+    max_tokens = MAX_TOKENS * ESTIMATE_MARGIN
+
+    num_paragraphs = len(paragraphs)
+    i = 0
+    while i < num_paragraphs:
+        para, para_start, para_end = paragraphs[i]
+
+        # Skip index-like content. Back-of-book indexes run for hundreds of
+        # paragraphs, so once two in a row look like index entries, probe ahead
+        # in strides and consume the run a stride at a time. A hit is confirmed
+        # by the paragraphs it jumped over; the run ends at the first that fails.
         if is_index_content(para):
-            char_position = para_end
+            # End the chunk here so its span never takes in the skipped run. The
+            # chunks either side are kept even if short, as they no longer merge.
+            if current_paragraphs:
+                save_chunk(current_paragraphs, keep_short=True)
+                current_paragraphs = []
+                current_tokens = 0
+            keep_next_short = True
+
+            run_end = i + 1
+            if run_end < num_paragraphs and is_index_content(paragraphs[run_end][0]):
+                run_end += 1
+                while (run_end + INDEX_SKIP_STRIDE <= num_paragraphs
+                       and is_index_content(paragraphs[run_end + INDEX_SKIP_STRIDE - 1][0])):
+                    stride_end = run_end + INDEX_SKIP_STRIDE - 1
+                    while run_end < stride_end and is_index_content(paragraphs[run_end][0]):
+                        run_end += 1
+                    if run_end < stride_end:
+                        break
+                    run_end += 1
+            i = run_end
             continue
 
         # Check for chapter change
         new_chapter = get_chapter_at(para_start)
         if new_chapter != current_chapter:
             if current_paragraphs:
-                save_chunk(current_paragraphs, chunk_start_char, char_position)
+                save_chunk(current_paragraphs)
                 current_paragraphs = []
                 current_tokens = 0
             current_chapter = new_chapter
-            chunk_start_char = para_start
 
-        # Split paragraph into sentences
-        sentences = split_into_sentences(para)
-        para_tokens = count_tokens(para, tokenizer)
+        # Split paragraph into sentences, with their offsets into the paragraph
+        sentence_spans = split_sentence_spans(para)
+        para_tokens = len(para) * tokens_per_char
 
         # If adding this paragraph exceeds target, save current chunk first
-        if current_tokens + para_tokens > TARGET_TOKENS and current_paragraphs:
-            save_chunk(current_paragraphs, chunk_start_char, para_start)
+        if current_tokens + para_tokens > target_tokens and current_paragraphs:
+            save_chunk(current_paragraphs)
             current_paragraphs = []
             current_tokens = 0
-            chunk_start_char = para_start
 
         # Handle very large paragraphs by splitting at sentence boundaries
-        if para_tokens > MAX_TOKENS:
+        if para_tokens > max_tokens:
             # Save any current content first
             if current_paragraphs:
-                save_chunk(current_paragraphs, chunk_start_char, para_start)
+                save_chunk(current_paragraphs)
                 current_paragraphs = []
                 current_tokens = 0
-                chunk_start_char = para_start
 
             # Split this paragraph into smaller chunks
             current_sents = []
             current_sent_tokens = 0
-            for sent in sentences:
-                sent_tokens = count_tokens(sent, tokenizer)
-                if current_sent_tokens + sent_tokens > TARGET_TOKENS and current_sents:
+            sents_start = sents_end = 0
+            for sent, sent_start, sent_end in sentence_spans:
+                sent_tokens = len(sent) * tokens_per_char
+                if current_sent_tokens + sent_tokens > target_tokens and current_sents:
                     # Save current sentences as a chunk
-                    save_chunk([(para, current_sents)], chunk_start_char, para_end)
+                    save_chunk([(current_sents, para_start + sents_start, para_start + sents_end, False)])
                     current_sents = []
                     current_sent_tokens = 0
-                    chunk_start_char = para_start
 
+                if not current_sents:
+                    sents_start = sent_start
                 current_sents.append(sent)
+                sents_end = sent_end
                 current_sent_tokens += sent_tokens
 
             # Add remaining sentences to current paragraphs
             if current_sents:
-                current_paragraphs.append((para, current_sents))
+                current_paragraphs.append((current_sents, para_start + sents_start, para_start + sents_end, False))
                 current_tokens = current_sent_tokens
         else:
             # Add paragraph to current chunk
-            current_paragraphs.append((para, sentences))
+            sentences = [sent for sent, _, _ in sentence_spans]
+            current_paragraphs.append((sentences, para_start, para_end, True))
             current_tokens += para_tokens
 
-        char_position = para_end
+        i += 1
 
     # Save final chunk
     if current_paragraphs:
-        save_chunk(current_paragraphs, chunk_start_char, len(text))
+        save_chunk(current_paragraphs)
 
     # Update total_chunks and add prev/next IDs
     for i, chunk in enumerate(chunks):
@@ -417,51 +679,71 @@ def create_chunks(text: str, source_file: str) -> List[Chunk]:
     return chunks
 
 
-def add_embedding_prefix(chunks: List[Dict]) -> List[Dict]:
+def add_embedding_prefix(chunks: Iterable[Dict]) -> Iterator[Dict]:
     """Add E5 embedding prefix to chunk text for better retrieval."""
     for chunk in chunks:
         # E5 models use "passage: " prefix for documents
         chunk["text_for_embedding"] = f"passage: {chunk['text']}"
+        yield chunk
+
+
+def chunk_file(txt_file: Path, output_path: Path) -> List[Chunk]:
+    """Read, chunk and save a single file (runs in a worker process)."""
+    text = txt_file.read_text(encoding='utf-8')
+    chunks = create_chunks(text, txt_file.name)
+
+    # Write to a temp file and rename so a crashed worker never leaves partial JSON
+    output_file = output_path / f"{txt_file.stem}_chunks.json"
+    tmp_file = output_file.with_name(output_file.name + ".tmp")
+    tmp_file.write_bytes(orjson.dumps([chunk_to_dict(c) for c in chunks], option=orjson.OPT_INDENT_2))
+    os.replace(tmp_file, output_file)
+
     return chunks
 
 
 def process_all(input_dir: str, output_dir: str):
-    """Process all cleaned texts into chunks."""
+    """Process all cleaned texts into chunks, one worker process per file."""
     input_path, output_path = Path(input_dir), Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
+    txt_files = sorted(input_path.glob("*.txt"))
+    chunks_by_file = {}
+
+    with ProcessPoolExecutor(max_workers=CHUNK_WORKERS) as executor:
+        futures = {executor.submit(chunk_file, txt_file, output_path): txt_file for txt_file in txt_files}
+        for future in as_completed(futures):
+            txt_file = futures[future]
+            print(f"Chunking: {txt_file.name}")
+            try:
+                chunks = future.result()
+
+                print(f"  Created {len(chunks)} chunks")
+                if chunks:
+                    avg = sum(c.token_count for c in chunks) / len(chunks)
+                    with_concepts = sum(1 for c in chunks if c.concepts)
+                    with_chapter = sum(1 for c in chunks if c.chapter)
+                    print(f"  Avg tokens: {avg:.0f}, with concepts: {with_concepts}, with chapter: {with_chapter}")
+
+                chunks_by_file[txt_file] = chunks
+
+            except Exception as e:
+                print(f"  ERROR: {e}")
+                import traceback
+                traceback.print_exc()
+
+    # Keep the combined output in file order regardless of completion order
     all_chunks = []
+    for txt_file in txt_files:
+        all_chunks.extend(chunks_by_file.get(txt_file, []))
 
-    for txt_file in sorted(input_path.glob("*.txt")):
-        print(f"Chunking: {txt_file.name}")
-        try:
-            text = txt_file.read_text(encoding='utf-8')
-            chunks = create_chunks(text, txt_file.name)
-
-            print(f"  Created {len(chunks)} chunks")
-            if chunks:
-                avg = sum(c.token_count for c in chunks) / len(chunks)
-                with_concepts = sum(1 for c in chunks if c.concepts)
-                with_chapter = sum(1 for c in chunks if c.chapter)
-                print(f"  Avg tokens: {avg:.0f}, with concepts: {with_concepts}, with chapter: {with_chapter}")
-
-            output_file = output_path / f"{txt_file.stem}_chunks.json"
-            chunk_dicts = [asdict(c) for c in chunks]
-            output_file.write_text(json.dumps(chunk_dicts, indent=2))
-            all_chunks.extend(chunks)
-
-        except Exception as e:
-            print(f"  ERROR: {e}")
-            import traceback
-            traceback.print_exc()
-
-    # Convert to dicts and add embedding prefix
-    all_chunk_dicts = [asdict(c) for c in all_chunks]
-    all_chunk_dicts = add_embedding_prefix(all_chunk_dicts)
-
-    # Save combined file
+    # Stream the combined file one chunk at a time, adding the embedding prefix
     combined = output_path / "_all_chunks.json"
-    combined.write_text(json.dumps(all_chunk_dicts, indent=2))
+    with open(combined, "wb") as f:
+        f.write(b"[")
+        for i, chunk_dict in enumerate(add_embedding_prefix(chunk_to_dict(c) for c in all_chunks)):
+            f.write(b",\n" if i else b"\n")
+            f.write(orjson.dumps(chunk_dict, option=orjson.OPT_INDENT_2))
+        f.write(b"\n]")
     print(f"\nTotal: {len(all_chunks)} chunks -> {combined}")
 
     # Print concept summary
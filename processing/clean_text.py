@@ -17,48 +17,59 @@ Preserves:
 - Chapter titles and structure
 """
 
+import io
+import os
 import re
 import sys
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    # Optional: RE2 runs the whole-text whitespace passes several times faster
+    import re2 as _text_re
+except ImportError:
+    _text_re = re
 
 
 # Patterns to identify sections to REMOVE
 REMOVE_PATTERNS = [
     # Table of contents variations
-    r"(?i)^\s*table\s+of\s+contents?\s*$",
-    r"(?i)^\s*contents?\s*$",
-    r"(?i)^\s*INHALT\s*$",  # German
+    r"^\s*table\s+of\s+contents?\s*$",
+    r"^\s*contents?\s*$",
+    r"^\s*INHALT\s*$",  # German
     # Index sections
-    r"(?i)^\s*index\s*$",
-    r"(?i)^\s*subject\s+index\s*$",
-    r"(?i)^\s*name\s+index\s*$",
-    r"(?i)^\s*general\s+index\s*$",
+    r"^\s*index\s*$",
+    r"^\s*subject\s+index\s*$",
+    r"^\s*name\s+index\s*$",
+    r"^\s*general\s+index\s*$",
     # Forewords and introductions (not by Jung)
-    r"(?i)^\s*foreword\s*$",
-    r"(?i)^\s*editor\'?s?\s+(note|preface|introduction|foreword)\s*$",
-    r"(?i)^\s*translator\'?s?\s+(note|preface|introduction|foreword)\s*$",
-    r"(?i)^\s*publisher\'?s?\s+note\s*$",
-    r"(?i)^\s*editorial\s+note\s*$",
-    r"(?i)^\s*introduction\s+by\s+(?!c\.?g\.?\s*jung|carl\s+(gustav\s+)?jung)",
-    r"(?i)^\s*preface\s+by\s+(?!c\.?g\.?\s*jung|carl\s+(gustav\s+)?jung)",
+    r"^\s*foreword\s*$",
+    r"^\s*editor\'?s?\s+(note|preface|introduction|foreword)\s*$",
+    r"^\s*translator\'?s?\s+(note|preface|introduction|foreword)\s*$",
+    r"^\s*publisher\'?s?\s+note\s*$",
+    r"^\s*editorial\s+note\s*$",
+    r"^\s*introduction\s+by\s+(?!c\.?g\.?\s*jung|carl\s+(gustav\s+)?jung)",
+    r"^\s*preface\s+by\s+(?!c\.?g\.?\s*jung|carl\s+(gustav\s+)?jung)",
     # Bibliography and references (editorial)
-    r"(?i)^\s*bibliography\s*$",
-    r"(?i)^\s*references\s*$",
-    r"(?i)^\s*works\s+cited\s*$",
-    r"(?i)^\s*suggested\s+reading\s*$",
-    r"(?i)^\s*further\s+reading\s*$",
+    r"^\s*bibliography\s*$",
+    r"^\s*references\s*$",
+    r"^\s*works\s+cited\s*$",
+    r"^\s*suggested\s+reading\s*$",
+    r"^\s*further\s+reading\s*$",
     # Appendices (often editorial)
-    r"(?i)^\s*appendix\s*:\s*chronolog",
-    r"(?i)^\s*appendix\s*:\s*bibliograph",
+    r"^\s*appendix\s*:\s*chronolog",
+    r"^\s*appendix\s*:\s*bibliograph",
     # Copyright and publication info
-    r"(?i)^\s*copyright\s*©?\s*\d{4}",
-    r"(?i)^\s*all\s+rights\s+reserved",
-    r"(?i)^\s*isbn[\s:-]*[\d-]+",
-    r"(?i)^\s*library\s+of\s+congress",
-    r"(?i)^\s*printed\s+in\s+(the\s+)?(united\s+states|usa|u\.s\.a\.|great\s+britain|uk)",
-    r"(?i)^\s*published\s+by\s+",
-    r"(?i)^\s*first\s+(published|edition|printing)",
+    r"^\s*copyright\s*©?\s*\d{4}",
+    r"^\s*all\s+rights\s+reserved",
+    r"^\s*isbn[\s:-]*[\d-]+",
+    r"^\s*library\s+of\s+congress",
+    r"^\s*printed\s+in\s+(the\s+)?(united\s+states|usa|u\.s\.a\.|great\s+britain|uk)",
+    r"^\s*published\s+by\s+",
+    r"^\s*first\s+(published|edition|printing)",
 ]
 
 # Patterns for headers/footers to remove (usually page numbers, running headers)
@@ -73,39 +84,161 @@ HEADER_FOOTER_PATTERNS = [
 
 # Patterns indicating Jung's own content (KEEP these)
 JUNG_CONTENT_PATTERNS = [
-    r"(?i)^\s*(preface|foreword|introduction)\s+by\s+(c\.?g\.?\s*jung|carl\s+(gustav\s+)?jung)",
-    r"(?i)^\s*author\'?s?\s+(preface|foreword|note|introduction)",
-    r"(?i)^\s*jung\'?s?\s+(preface|foreword|note)",
+    r"^\s*(preface|foreword|introduction)\s+by\s+(c\.?g\.?\s*jung|carl\s+(gustav\s+)?jung)",
+    r"^\s*author\'?s?\s+(preface|foreword|note|introduction)",
+    r"^\s*jung\'?s?\s+(preface|foreword|note)",
+]
+
+# Patterns for table-of-contents entries (matched case-insensitively)
+TOC_PATTERNS = [
+    # Roman numeral entries (I., II., III., etc.)
+    r"^\s*[IVXLCDM]+\.?\s*$",
+    # Roman numeral with date (seminar listings)
+    r"^\s*[IVXLCDM]+\.?\s+\d{1,2}\s+(january|february|march|april|may|june|july|august|september|october|november|december)",
+    # Chapter/Part listings
+    r"^\s*(chapter|part|section|lecture|seminar)\s+\d+",
+    # Page number references (roman or arabic)
+    r"^\s*[ivxlcdm]+\s*$",
+    r"^\s*[IVXLCDM]+\s*$",
+    r"^\s*\d{1,4}\s*$",
+    # Section titles with page numbers
+    r"^\s*(introduction|preface|foreword|acknowledgments?|bibliography|index|contents)\s*[ivxlcdm]*\s*$",
+    # Lines that are just titles (all caps, short)
+    r"^[A-Z][A-Z\s]{2,30}$",
+    # Date-only lines
+    r"^\s*\d{1,2}\s+(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{4}\s*$",
 ]
 
+# Markers indicating we're definitely still in front matter. They are plain text, so
+# lines are matched lowercased with whitespace runs collapsed: phrases can appear
+# anywhere in a line, headings must be the whole line, prefixes must start it.
+FRONT_MATTER_PHRASES = (
+    "copyright",
+    "all rights reserved",
+    "isbn",
+    "library of congress",
+    "printed in united", "printed in the united",
+    "printed in usa", "printed in the usa",
+    "printed in u.s", "printed in the u.s",
+    "published by",
+    "bollingen series",
+    "princeton university press",
+    "routledge",
+    "first edition", "first printing", "first published",
+)
+FRONT_MATTER_HEADINGS = frozenset([
+    "table of contents",
+    "contents",
+    "acknowledgment", "acknowledgments",
+    "members of the seminar",
+    "list of abbreviations", "list of illustrations",
+    "bibliographical note",
+])
+FRONT_MATTER_PREFIXES = ("chronology", "chronological")
+
+# Patterns indicating back matter start (must be standalone section headers)
+BACK_MATTER_PATTERNS = [
+    r"^\s*index\s*$",
+    r"^\s*subject\s+index\s*$",
+    r"^\s*name\s+index\s*$",
+    r"^\s*general\s+index\s*$",
+    r"^\s*bibliography\s*$",
+    r"^\s*works\s+cited\s*$",
+]
+
+
+def _union(patterns: List[str], flags: int = 0) -> re.Pattern:
+    """Fuse a pattern list into one alternation so each line costs a single regex call."""
+    return re.compile("|".join(f"(?:{p})" for p in patterns), flags)
+
+
+# Compiled once at import; the predicates below run on every line of every book
+_REMOVE_RE = _union(REMOVE_PATTERNS, re.IGNORECASE)
+_HEADER_FOOTER_RE = _union(HEADER_FOOTER_PATTERNS)
+_JUNG_CONTENT_RE = _union(JUNG_CONTENT_PATTERNS, re.IGNORECASE)
+_TOC_RE = _union(TOC_PATTERNS, re.IGNORECASE)
+
+
+def _line_union(patterns: List[str]) -> str:
+    """Fuse whole-line patterns into a multiline alternation for scanning full texts.
+
+    Whitespace classes exclude the newline so no pattern can reach across a line break.
+    """
+    return r"(?m)^(?:" + "|".join(
+        p.removeprefix("^").removesuffix("$").replace(r"\s", r"[^\S\n]") for p in patterns
+    ) + r")$"
+
+
+# Whole-text forms: a header/footer line plus its newline, a back matter heading line,
+# and per-line edge whitespace
+_HEADER_FOOTER_LINE_RE = re.compile(_line_union(HEADER_FOOTER_PATTERNS) + r"\n?")
+_BACK_MATTER_LINE_RE = re.compile(_line_union(BACK_MATTER_PATTERNS), re.IGNORECASE)
+# [^\S\n] spelled out, since RE2's \s only covers ASCII whitespace
+_LINE_WS = "\t\x0b\x0c\r\x1c-\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
+_LINE_EDGE_WS_RE = _text_re.compile(f"(?m)^[{_LINE_WS}]+|[{_LINE_WS}]+$")
+_PAGE_MARKER_RE = re.compile(r"\[PAGE\s+\d+\]")
+
+# OCR artifact cleanup. Name fixes cannot interact, so they share one pass and the
+# named group that matched selects the replacement; order-sensitive ones stay separate.
+_WATERMARK_RE = re.compile(r"Copyrighted Material\s*", re.IGNORECASE)
+_OCR_FIX_RE = re.compile(
+    # The lookahead lists every possible first character, so the engine can skip
+    # ahead instead of trying each branch at every position
+    r"(?=[jJCMP])(?:"
+    r"(?P<jung>(?i:\bj\s+u\s+n\s+g\b))"
+    r"|(?P<cg>\bC\s*\.\s*G\s*\.)"
+    r"|(?P<md>\bM\s*\.\s*D\s*\.)"
+    r"|(?P<phd>\bP\s*h\s*\.\s*D\s*\.)"
+    r")"
+)
+_OCR_NAME_FIXES = {"jung": "Jung", "cg": "C.G.", "md": "M.D.", "phd": "Ph.D."}
+# Quote/dash/ellipsis normalization; str.replace is a C-level search per character
+# and returns the text unchanged when the character is absent
+_PUNCT_REPLACEMENTS = (
+    ("\u201c", '"'), ("\u201d", '"'), ("\u201e", '"'), ("\u201f", '"'),
+    ("\u2018", "'"), ("\u2019", "'"), ("\u201a", "'"), ("\u201b", "'"),
+    ("\u2026", "..."), ("\u2014", "-"), ("\u2013", "-"),
+)
+_SPACED_CAPS_RE = re.compile(r"\b([A-Z])\s+([A-Z])\s+([A-Z])\s+([A-Z])(?:\s+([A-Z]))?\b")
+_LINE_BREAK_HYPHEN_RE = re.compile(r"(\w)-\s*\n\s*(\w)")
+_SPACES_RE = re.compile(r"[ \t]+")
+_BREAK_MARKER_RE = re.compile(r"\[PAGE\s+\d+\]|---CHAPTER BREAK---")
+_EXCESS_NEWLINES_RE = _text_re.compile(r"\n{3,}")
+
+# Line labels for the front matter scan
+_BLANK, _FRONT_MATTER, _TOC, _PROSE, _OTHER = "bftpo"
+FRONT_MATTER_BLOCK_LINES = 1024  # Lines classified per batch while looking for content
+FRONT_MATTER_SCAN_LIMIT = 1000  # Give up on non-blank, non-front-matter lines past this index
+_PROSE_PAIR_RE = re.compile(_PROSE + _BLANK + "*" + _PROSE)  # Prose twice with only blank lines between
+_SCAN_STOP_RE = re.compile(f"[{_PROSE}{_OTHER}]")
+
+# Footnote reference markers
+_SUPERSCRIPT_RE = re.compile(r"[¹²³⁴⁵⁶⁷⁸⁹⁰]+")
+_BRACKET_REF_RE = re.compile(r"\[\d+\](?!\s*[A-Z])")
+_SECTION_END_RE = _union([
+    r"^\s*(chapter|part)\s+[IVXLCDM\d]+",
+    r"^\s*\d+\.\s+[A-Z]",  # Numbered chapter
+], re.IGNORECASE)
+
 
 def is_section_to_remove(line: str) -> bool:
     """Check if line indicates start of a section to remove"""
-    for pattern in REMOVE_PATTERNS:
-        if re.match(pattern, line):
-            return True
-    return False
+    return _REMOVE_RE.match(line) is not None
 
 
 def is_jung_content(line: str) -> bool:
     """Check if line indicates Jung's own content"""
-    for pattern in JUNG_CONTENT_PATTERNS:
-        if re.match(pattern, line):
-            return True
-    return False
+    return _JUNG_CONTENT_RE.match(line) is not None
 
 
 def is_header_footer(line: str) -> bool:
     """Check if line is likely a header/footer"""
-    for pattern in HEADER_FOOTER_PATTERNS:
-        if re.match(pattern, line.strip()):
-            return True
-    return False
+    return _HEADER_FOOTER_RE.match(line.strip()) is not None
 
 
 def clean_page_markers(text: str) -> str:
     """Remove [PAGE X] markers but preserve structure"""
-    text = re.sub(r"\[PAGE\s+\d+\]", "", text)
+    text = _PAGE_MARKER_RE.sub("", text)
     return text
 
 
@@ -115,25 +248,17 @@ def is_toc_line(line: str) -> bool:
     if not stripped:
         return False
 
-    toc_patterns = [
-        # Roman numeral entries (I., II., III., etc.)
-        r"^\s*[IVXLCDM]+\.?\s*$",
-        # Roman numeral with date (seminar listings)
-        r"^\s*[IVXLCDM]+\.?\s+\d{1,2}\s+(january|february|march|april|may|june|july|august|september|october|november|december)",
-        # Chapter/Part listings
-        r"(?i)^\s*(chapter|part|section|lecture|seminar)\s+\d+",
-        # Page number references (roman or arabic)
-        r"^\s*[ivxlcdm]+\s*$",
-        r"^\s*[IVXLCDM]+\s*$",
-        r"^\s*\d{1,4}\s*$",
-        # Section titles with page numbers
-        r"(?i)^\s*(introduction|preface|foreword|acknowledgments?|bibliography|index|contents)\s*[ivxlcdm]*\s*$",
-        # Lines that are just titles (all caps, short)
-        r"^[A-Z][A-Z\s]{2,30}$",
-        # Date-only lines
-        r"^\s*\d{1,2}\s+(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{4}\s*$",
-    ]
-    return any(re.match(p, stripped, re.IGNORECASE) for p in toc_patterns)
+    return _TOC_RE.match(stripped) is not None
+
+
+def is_front_matter_line(line: str) -> bool:
+    """Check if a line is clearly front matter (copyright, publisher, contents...)"""
+    normalized = " ".join(line.lower().split())
+    return (
+        any(phrase in normalized for phrase in FRONT_MATTER_PHRASES)
+        or normalized in FRONT_MATTER_HEADINGS
+        or normalized.startswith(FRONT_MATTER_PREFIXES)
+    )
 
 
 def is_prose_paragraph(line: str) -> bool:
@@ -143,96 +268,94 @@ def is_prose_paragraph(line: str) -> bool:
         return False
 
     # Must start with a capital letter or quote
-    if not re.match(r'^[A-Z"\']', stripped):
-        return False
-
-    # Must contain multiple words with lowercase letters
-    words = stripped.split()
-    if len(words) < 10:
+    first = stripped[0]
+    if not ('A' <= first <= 'Z' or first == '"' or first == "'"):
         return False
 
     # Check for sentence-like structure (has periods, commas)
-    if not re.search(r'[,.]', stripped):
+    if ',' not in stripped and '.' not in stripped:
         return False
 
     # Should have a mix of upper and lower case (not all caps)
     if stripped.isupper():
         return False
 
+    # Must contain multiple words with lowercase letters; splitting stops at the tenth
+    if len(stripped.split(None, 9)) < 10:
+        return False
+
     return True
 
 
+def _iter_line_blocks(text: str, size: int) -> Iterator[Tuple[List[str], bool]]:
+    """Yield (lines, is_last) blocks of text.split('\n') without splitting the whole text."""
+    start = 0
+    while True:
+        end = start
+        for _ in range(size):
+            end = text.find('\n', end) + 1
+            if not end:
+                yield text[start:].split('\n'), True
+                return
+        yield text[start:end - 1].split('\n'), False
+        start = end
+
+
+def _front_matter_labels(lines: List[str]) -> str:
+    """Classify a block of lines for remove_front_matter, one label character per line."""
+    block = [line.strip() for line in lines]
+    return "".join([
+        _BLANK if not stripped
+        else _FRONT_MATTER if is_front_matter_line(stripped)
+        else _TOC if _TOC_RE.match(stripped)
+        else _PROSE if is_prose_paragraph(stripped)
+        else _OTHER
+        for stripped in block
+    ])
+
+
+def _find_content_start(labels: str, complete: bool) -> Optional[int]:
+    """
+    Find where content starts from the line labels, as regex searches over the label string.
+    Returns 0 if the scan gives up, or None if more labels are needed to decide.
+    """
+    # 2+ consecutive prose paragraphs (blank lines between are fine) mean we've found content,
+    # unless the safety limit stops the scan first
+    pair = _PROSE_PAIR_RE.search(labels)
+    stop = _SCAN_STOP_RE.search(labels, FRONT_MATTER_SCAN_LIMIT + 1)
+    if pair and (stop is None or pair.end() <= stop.end()):
+        second_prose = pair.end() - 1
+        last_front_matter_idx = labels.rfind(_FRONT_MATTER, 0, second_prose)
+        return max(last_front_matter_idx + 1, second_prose - 1)
+    if stop or complete:
+        return 0
+    return None
+
+
 def remove_front_matter(text: str, verbose: bool = False) -> str:
     """
     Remove front matter (copyright, publisher info, TOC) from the beginning.
     Uses a more sophisticated approach to find actual prose content.
     """
-    lines = text.split('\n')
-
-    # Patterns indicating we're definitely still in front matter
-    front_matter_patterns = [
-        r"(?i)copyright",
-        r"(?i)all\s+rights\s+reserved",
-        r"(?i)isbn",
-        r"(?i)library\s+of\s+congress",
-        r"(?i)printed\s+in\s+(the\s+)?(united|usa|u\.s)",
-        r"(?i)published\s+by",
-        r"(?i)bollingen\s+series",
-        r"(?i)princeton\s+university\s+press",
-        r"(?i)routledge",
-        r"(?i)first\s+(edition|printing|published)",
-        r"(?i)^\s*table\s+of\s+contents\s*$",
-        r"(?i)^\s*contents\s*$",
-        r"(?i)^\s*acknowledgments?\s*$",
-        r"(?i)^\s*members\s+of\s+the\s+seminar\s*$",
-        r"(?i)^\s*list\s+of\s+(abbreviations|illustrations)\s*$",
-        r"(?i)^\s*bibliographical\s+note\s*$",
-        r"(?i)^\s*chronolog(y|ical)\s*",
-    ]
-
-    # Track state
+    # Split and label lines a block at a time until the scan can decide; books are
+    # long and the decision usually comes within the first block
+    labels = ""
+    scanned_lines = []
     content_start_idx = 0
-    consecutive_prose = 0
-    last_front_matter_idx = -1
-
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        if not stripped:
-            continue
-
-        # Check if this is clearly front matter
-        is_front_matter = any(re.search(p, stripped) for p in front_matter_patterns)
-        if is_front_matter:
-            last_front_matter_idx = i
-            consecutive_prose = 0
-            continue
-
-        # Check if this looks like a TOC line
-        if is_toc_line(stripped):
-            consecutive_prose = 0
-            continue
-
-        # Check if this looks like prose
-        if is_prose_paragraph(stripped):
-            consecutive_prose += 1
-            # If we see 2+ consecutive prose paragraphs, we've found content
-            if consecutive_prose >= 2:
-                # Start from the first prose paragraph
-                content_start_idx = max(last_front_matter_idx + 1, i - consecutive_prose + 1)
-                break
-        else:
-            # Reset if we see non-prose after prose (might still be in mixed section)
-            if consecutive_prose == 1:
-                consecutive_prose = 0
-
-        # Safety limit
-        if i > 1000:
+    for block, is_last in _iter_line_blocks(text, FRONT_MATTER_BLOCK_LINES):
+        scanned_lines.extend(block)
+        labels += _front_matter_labels(block)
+        found = _find_content_start(labels, complete=is_last)
+        if found is not None:
+            content_start_idx = found
             break
 
     if content_start_idx > 0 and verbose:
         print(f"  Removing {content_start_idx} lines of front matter")
 
-    return '\n'.join(lines[content_start_idx:])
+    # Slice the original text rather than rejoining the remaining lines
+    offset = sum(len(line) + 1 for line in scanned_lines[:content_start_idx])
+    return text[offset:]
 
 
 def remove_back_matter(text: str, verbose: bool = False) -> str:
@@ -242,44 +365,41 @@ def remove_back_matter(text: str, verbose: bool = False) -> str:
     1. The pattern is found in the last 15% of the document
     2. The remaining content after removal is at least 85% of original
     """
-    lines = text.split('\n')
-    total_lines = len(lines)
+    total_lines = text.count('\n') + 1
 
     if total_lines < 100:
         return text  # Too short to have meaningful back matter
 
-    # Patterns indicating back matter start (must be standalone section headers)
-    back_matter_patterns = [
-        r"(?i)^\s*index\s*$",
-        r"(?i)^\s*subject\s+index\s*$",
-        r"(?i)^\s*name\s+index\s*$",
-        r"(?i)^\s*general\s+index\s*$",
-        r"(?i)^\s*bibliography\s*$",
-        r"(?i)^\s*works\s+cited\s*$",
-    ]
-
     # Only search in the last 15% of the document
     search_start = int(total_lines * 0.85)
 
+    # The last heading with substantial content after it wins; one scan finds it
+    # without splitting the text into lines
+    content_limit = len(text) - 500  # Must have some content to be real back matter
+    heading_pos = -1
+    for match in _BACK_MATTER_LINE_RE.finditer(text):
+        if match.start() >= content_limit:
+            break
+        heading_pos = match.start()
+
     back_matter_start = total_lines
-    for i in range(total_lines - 1, search_start, -1):
-        stripped = lines[i].strip()
-        if any(re.match(p, stripped) for p in back_matter_patterns):
-            # Verify this looks like a real section header (followed by content)
-            # Check that there's substantial content after this point
-            remaining_content = '\n'.join(lines[i:])
-            if len(remaining_content) > 500:  # Must have some content to be real back matter
-                back_matter_start = i
-                break
+    if heading_pos >= 0:
+        line_index = text.count('\n', 0, heading_pos)
+        if line_index > search_start:
+            back_matter_start = line_index
 
     # Safety check: don't remove more than 15% of the document
     if back_matter_start < int(total_lines * 0.85):
         return text  # Would remove too much, skip
 
-    if back_matter_start < total_lines and verbose:
+    if back_matter_start == total_lines:
+        return text
+
+    if verbose:
         print(f"  Removing {total_lines - back_matter_start} lines of back matter")
 
-    return '\n'.join(lines[:back_matter_start])
+    # Drop the heading line and the newline that ends the kept text
+    return text[:heading_pos - 1]
 
 
 def identify_section_boundaries(text: str) -> List[Tuple[int, int, str]]:
@@ -287,37 +407,29 @@ def identify_section_boundaries(text: str) -> List[Tuple[int, int, str]]:
     Find sections that should be removed.
     Returns list of (start_line, end_line, section_type) tuples.
     """
-    lines = text.split("\n")
+    lines = [line.strip() for line in text.split("\n")]
     sections_to_remove = []
 
+    # Classify every line up front: where a removable section may start, and
+    # where one ends (next major heading or Jung content)
+    start_lines = [
+        i for i, line in enumerate(lines) if is_section_to_remove(line) and not is_jung_content(line)
+    ]
+    end_lines = [
+        i for i, line in enumerate(lines) if is_jung_content(line) or _SECTION_END_RE.match(line)
+    ]
+
     i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-
-        # Check if this line starts a section to remove
-        if is_section_to_remove(line) and not is_jung_content(line):
-            section_start = i
-            section_type = line
-
-            # Find where this section ends
-            j = i + 1
-            while j < len(lines):
-                next_line = lines[j].strip()
-
-                # Section ends at next major heading or Jung content
-                if is_jung_content(next_line):
-                    break
-                if re.match(r"(?i)^\s*(chapter|part)\s+[IVXLCDM\d]+", next_line):
-                    break
-                if re.match(r"(?i)^\s*\d+\.\s+[A-Z]", next_line):  # Numbered chapter
-                    break
-
-                j += 1
-
-            sections_to_remove.append((section_start, j, section_type))
-            i = j
-        else:
-            i += 1
+    for section_start in start_lines:
+        if section_start < i:
+            continue  # Inside the previous section
+
+        # The section runs to the first end line after its heading
+        k = bisect_right(end_lines, section_start)
+        j = end_lines[k] if k < len(end_lines) else len(lines)
+
+        sections_to_remove.append((section_start, j, lines[section_start]))
+        i = j
 
     return sections_to_remove
 
@@ -328,60 +440,49 @@ def remove_footnote_markers(text: str) -> str:
     Handles various footnote styles: superscript, bracketed, etc.
     """
     # Remove superscript numbers (common in academic texts)
-    text = re.sub(r"[¹²³⁴⁵⁶⁷⁸⁹⁰]+", "", text)
+    text = _SUPERSCRIPT_RE.sub("", text)
 
     # Remove bracketed numbers like [1], [2], etc. (but keep if followed by actual text)
     # This preserves footnote content while removing inline references
-    text = re.sub(r"\[\d+\](?!\s*[A-Z])", "", text)
+    text = _BRACKET_REF_RE.sub("", text)
 
     return text
 
 
+def _fix_ocr_match(match: re.Match) -> str:
+    return _OCR_NAME_FIXES[match.lastgroup]
+
+
 def clean_ocr_artifacts(text: str) -> str:
     """Clean common OCR errors and artifacts while preserving paragraph structure"""
     # First, normalize line endings
     text = text.replace('\r\n', '\n').replace('\r', '\n')
 
     # Remove "Copyrighted Material" watermarks
-    text = re.sub(r"Copyrighted Material\s*", "", text, flags=re.IGNORECASE)
+    text = _WATERMARK_RE.sub("", text)
 
     # Fix OCR spacing in names (j u n g -> jung, C . G . -> C.G.)
-    text = re.sub(r"\bj\s+u\s+n\s+g\b", "Jung", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bC\s*\.\s*G\s*\.", "C.G.", text)
-    text = re.sub(r"\bM\s*\.\s*D\s*\.", "M.D.", text)
-    text = re.sub(r"\bP\s*h\s*\.\s*D\s*\.", "Ph.D.", text)
-    # Fix spaced-out words (common OCR issue): "w o r d" -> "word"
-    text = re.sub(r"\b([A-Z])\s+([A-Z])\s+([A-Z])\s+([A-Z])\s+([A-Z])\b", r"\1\2\3\4\5", text)
-    text = re.sub(r"\b([A-Z])\s+([A-Z])\s+([A-Z])\s+([A-Z])\b", r"\1\2\3\4", text)
+    text = _OCR_FIX_RE.sub(_fix_ocr_match, text)
+    # Fix spaced-out words (common OCR issue): "W O R D" -> "WORD", five letters before four
+    text = _SPACED_CAPS_RE.sub(lambda m: "".join(m.group().split()), text)
 
     # Normalize quotes and punctuation (safe, doesn't affect structure)
-    text = re.sub(r'["""]', '"', text)
-    text = re.sub(r"[''']", "'", text)
-    text = re.sub(r"…", "...", text)
-    text = re.sub(r"—|–", "-", text)
+    for char, replacement in _PUNCT_REPLACEMENTS:
+        text = text.replace(char, replacement)
 
     # Fix hyphenation at line breaks (word-\nword -> wordword)
-    text = re.sub(r"(\w)-\s*\n\s*(\w)", r"\1\2", text)
+    text = _LINE_BREAK_HYPHEN_RE.sub(r"\1\2", text)
 
     # Normalize multiple spaces (but NOT newlines) to single space
-    text = re.sub(r"[ \t]+", " ", text)
+    text = _SPACES_RE.sub(" ", text)
 
-    # Remove [PAGE X] markers
-    text = re.sub(r"\[PAGE\s+\d+\]", "\n", text)
+    # Replace [PAGE X] markers with a line break and ---CHAPTER BREAK--- with a paragraph break
+    text = _BREAK_MARKER_RE.sub(lambda m: "\n" if m.group().startswith("[") else "\n\n", text)
 
-    # Remove ---CHAPTER BREAK--- markers but preserve the break
-    text = re.sub(r"---CHAPTER BREAK---", "\n\n", text)
-
-    # Normalize multiple newlines to max 2 (paragraph break)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-
-    # Clean up lines that are just whitespace
-    lines = text.split('\n')
-    lines = [line.strip() for line in lines]
-    text = '\n'.join(lines)
-
-    # Remove duplicate blank lines again after stripping
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    # Clean up lines that are just whitespace, then normalize multiple newlines
+    # to max 2 (paragraph break); one pass after stripping catches every run
+    text = _LINE_EDGE_WS_RE.sub("", text)
+    text = _EXCESS_NEWLINES_RE.sub("\n\n", text)
 
     return text
 
@@ -403,24 +504,20 @@ def clean_text(text: str, verbose: bool = False) -> str:
     text = remove_back_matter(text, verbose=verbose)
 
     # Step 4: Remove header/footer lines (standalone page numbers, etc.)
-    lines = text.split("\n")
-    lines = [line for line in lines if not is_header_footer(line)]
-    text = "\n".join(lines)
+    text = _HEADER_FOOTER_LINE_RE.sub("", text)
 
     # Step 5: Clean up footnote markers (but keep footnote content)
     text = remove_footnote_markers(text)
 
-    # Step 6: Final cleanup - normalize whitespace while preserving paragraphs
-    text = re.sub(r"\n{3,}", "\n\n", text)  # Max 2 newlines (paragraph break)
-    text = re.sub(r"[ \t]+", " ", text)  # Single spaces within lines
+    # Step 6: Final cleanup - normalize whitespace while preserving paragraphs.
+    # Removing footnote markers can leave double spaces, so spaces are collapsed again.
+    text = _SPACES_RE.sub(" ", text)  # Single spaces within lines
 
     # Clean up leading/trailing whitespace on each line
-    lines = text.split('\n')
-    lines = [line.strip() for line in lines]
-    text = '\n'.join(lines)
+    text = _LINE_EDGE_WS_RE.sub("", text)
 
-    # Remove any remaining excessive blank lines
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    # Max 2 newlines (paragraph break)
+    text = _EXCESS_NEWLINES_RE.sub("\n\n", text)
     text = text.strip()
 
     if verbose:
@@ -430,8 +527,28 @@ def clean_text(text: str, verbose: bool = False) -> str:
     return text
 
 
+def clean_file(txt_file: Path, output_path: Path, verbose: bool = True) -> str:
+    """Clean and save a single file (runs in a worker process).
+
+    Returns the file's progress output so it can be printed in one piece.
+    """
+    log = io.StringIO()
+    with redirect_stdout(log):
+        with open(txt_file, "r", encoding="utf-8") as f:
+            text = f.read()
+
+        cleaned = clean_text(text, verbose=verbose)
+
+        output_file = output_path / txt_file.name
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(cleaned)
+
+        print(f"  Saved to: {output_file}")
+    return log.getvalue()
+
+
 def process_directory(input_dir: str, output_dir: str, verbose: bool = True):
-    """Process all text files in a directory"""
+    """Process all text files in a directory, one worker process per file"""
     input_path = Path(input_dir)
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
@@ -441,23 +558,17 @@ def process_directory(input_dir: str, output_dir: str, verbose: bool = True):
         print(f"No text files found in {input_dir}")
         return
 
-    for txt_file in txt_files:
-        print(f"Cleaning: {txt_file.name}")
-
-        try:
-            with open(txt_file, "r", encoding="utf-8") as f:
-                text = f.read()
-
-            cleaned = clean_text(text, verbose=verbose)
-
-            output_file = output_path / txt_file.name
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(cleaned)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {executor.submit(clean_file, txt_file, output_path, verbose): txt_file for txt_file in txt_files}
+        for future in as_completed(futures):
+            txt_file = futures[future]
+            print(f"Cleaning: {txt_file.name}")
 
-            print(f"  Saved to: {output_file}")
+            try:
+                print(future.result(), end="")
 
-        except Exception as e:
-            print(f"  ERROR: {e}")
+            except Exception as e:
+                print(f"  ERROR: {e}")
 
 
 if __name__ == "__main__":
@@ -4,12 +4,67 @@ import re
 import sys
 from pathlib import Path
 
+# TOC remnants: roman numeral + page number, or Chapter...page
+_TOC_LINE_RE = re.compile(r'^\s*[IVXLCDM]+\.\s*\d+\s*$|^\s*Chapter\s+\d+\s*\.+\s*\d+\s*$', re.I)
+_PAGE_NUM_RE = re.compile(r'^\s*\d{1,4}\s*$')
+_SENTENCE_END_RE = re.compile(r'[.!?]')
 
-def evaluate_file(filepath: Path) -> dict:
-    """Evaluate a single file's quality."""
-    text = filepath.read_text(encoding='utf-8')
 
-    if not text.strip():
+def evaluate_file(filepath: Path) -> dict:
+    """Evaluate a single file's quality, streaming it line by line."""
+    chars = 0
+    head = []  # Leading lines covering the first 2000 chars, for the front matter check
+    head_chars = 0
+    non_empty_lines = 0
+    toc_lines = 0
+    page_num_lines = 0
+    prose_lines = 0
+
+    # Paragraphs as text.split('\n\n') would produce them: a "\n" that ended the
+    # previous line pairs with the next one when the line between them is empty
+    para_count = 0
+    para_chars = 0
+    cur_len = 0
+    cur_has_text = False
+    pending_newline = False
+
+    with open(filepath, encoding='utf-8') as f:
+        for raw in f:
+            chars += len(raw)
+            if head_chars <= 2000:
+                head.append(raw)
+                head_chars += len(raw)
+
+            has_newline = raw.endswith('\n')
+            line = raw[:-1] if has_newline else raw
+
+            if pending_newline and not line and has_newline:
+                if cur_has_text:
+                    para_count += 1
+                    para_chars += cur_len - 1
+                cur_len = 0
+                cur_has_text = False
+                pending_newline = False
+            else:
+                cur_len += len(raw)
+                pending_newline = has_newline
+
+            stripped = line.strip()
+            if stripped:
+                non_empty_lines += 1
+                cur_has_text = True
+                if len(line) > 60 and _SENTENCE_END_RE.search(line):
+                    prose_lines += 1
+            if _TOC_LINE_RE.match(line):
+                toc_lines += 1
+            if _PAGE_NUM_RE.match(stripped):
+                page_num_lines += 1
+
+    if cur_has_text:
+        para_count += 1
+        para_chars += cur_len
+
+    if not non_empty_lines:
         return {
             'name': filepath.name[:60],
             'chars': 0,
@@ -20,21 +75,17 @@ def evaluate_file(filepath: Path) -> dict:
             'score': 0
         }
 
-    lines = text.split('\n')
-    paragraphs = [p for p in text.split('\n\n') if p.strip()]
-
     issues = []
     score = 100
 
     # Check for single-line file (all content on one line)
-    non_empty_lines = [l for l in lines if l.strip()]
-    if len(non_empty_lines) == 1 and len(text) > 1000:
+    if non_empty_lines == 1 and chars > 1000:
         issues.append('SINGLE LINE (no paragraphs)')
         score -= 50
 
     # Check paragraph structure
-    if paragraphs:
-        avg_para = sum(len(p) for p in paragraphs) / len(paragraphs)
+    if para_count:
+        avg_para = para_chars / para_count
         if avg_para > 5000:
             issues.append(f'Paragraphs too long (avg {avg_para:.0f} chars)')
             score -= 20
@@ -47,31 +98,25 @@ def evaluate_file(filepath: Path) -> dict:
         score -= 30
 
     # Check for TOC remnants
-    toc_patterns = [
-        r'^\s*[IVXLCDM]+\.\s*\d+\s*$',  # Roman numeral + page number
-        r'^\s*Chapter\s+\d+\s*\.+\s*\d+\s*$',  # Chapter...page
-    ]
-    toc_lines = sum(1 for line in lines if any(re.match(p, line, re.I) for p in toc_patterns))
     if toc_lines > 5:
         issues.append(f'TOC remnants ({toc_lines} lines)')
         score -= 10
 
     # Check for excessive page numbers
-    page_num_lines = sum(1 for line in lines if re.match(r'^\s*\d{1,4}\s*$', line.strip()))
     if page_num_lines > 20:
         issues.append(f'Page numbers ({page_num_lines})')
         score -= 5
 
     # Check for front matter remnants
     front_patterns = ['copyright', 'isbn', 'all rights reserved', 'library of congress']
-    front_found = [p for p in front_patterns if p in text.lower()[:2000]]
+    head_text = ''.join(head).lower()[:2000]
+    front_found = [p for p in front_patterns if p in head_text]
     if front_found:
         issues.append(f'Front matter remnants')
         score -= 5
 
     # Check prose quality (% of lines that look like sentences)
-    prose_lines = sum(1 for l in non_empty_lines if len(l) > 60 and re.search(r'[.!?]', l))
-    prose_ratio = prose_lines / len(non_empty_lines) if non_empty_lines else 0
+    prose_ratio = prose_lines / non_empty_lines
     if prose_ratio < 0.3:
         issues.append(f'Low prose ratio ({prose_ratio:.0%})')
         score -= 15
@@ -80,9 +125,9 @@ def evaluate_file(filepath: Path) -> dict:
 
     return {
         'name': filepath.name[:60],
-        'chars': len(text),
-        'lines': len(non_empty_lines),
-        'paragraphs': len(paragraphs),
+        'chars': chars,
+        'lines': non_empty_lines,
+        'paragraphs': para_count,
         'avg_para_len': int(avg_para),
         'issues': issues,
         'score': score
@@ -3,14 +3,23 @@ EPUB Text Extraction Script
 Extracts and orders text content from EPUB files with improved quality.
 """
 
+import io
+import os
 import re
 import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-# pip install ebooklib beautifulsoup4
+# pip install ebooklib beautifulsoup4 lxml
 from ebooklib import epub, ITEM_DOCUMENT, ITEM_NAVIGATION
-from bs4 import BeautifulSoup, NavigableString
+from bs4 import BeautifulSoup, NavigableString, XMLParsedAsHTMLWarning
+
+# EPUB documents are XHTML; parsing them with lxml's HTML parser is intended
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+
+_WS_RE = re.compile(r'\s+')
 
 
 def should_skip_item(item, soup: BeautifulSoup) -> bool:
@@ -26,11 +35,13 @@ def should_skip_item(item, soup: BeautifulSoup) -> bool:
         return True
 
     # Check for nav elements in HTML
-    if soup.find('nav'):
-        nav_content = soup.find('nav').get_text(strip=True)
-        other_content = soup.get_text(strip=True).replace(nav_content, '')
+    nav = soup.find('nav')
+    if nav:
+        # The nav text is part of the page text, so only the lengths are needed
+        nav_length = len(nav.get_text(strip=True))
+        other_length = len(soup.get_text(strip=True)) - nav_length
         # If most content is in nav, skip
-        if len(other_content) < 100:
+        if other_length < 100:
             return True
 
     # Check for landmark/TOC structures
@@ -40,10 +51,11 @@ def should_skip_item(item, soup: BeautifulSoup) -> bool:
     return False
 
 
-def extract_text_from_html(html_content: bytes) -> str:
-    """Extract clean text from HTML content, preserving paragraph structure."""
-    soup = BeautifulSoup(html_content, 'html.parser')
+def extract_text_from_soup(soup: BeautifulSoup) -> str:
+    """Extract clean text from a parsed HTML document, preserving paragraph structure.
 
+    Unwanted elements are decomposed in place, so the soup is consumed.
+    """
     # Remove unwanted elements
     for element in soup(['script', 'style', 'nav', 'header', 'footer']):
         element.decompose()
@@ -55,7 +67,7 @@ def extract_text_from_html(html_content: bytes) -> str:
         element.decompose()
 
     # Extract text with paragraph preservation
-    paragraphs = []
+    buf = io.StringIO()
 
     # Process block-level elements
     block_tags = ['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
@@ -64,18 +76,19 @@ def extract_text_from_html(html_content: bytes) -> str:
     for tag in soup.find_all(block_tags):
         text = tag.get_text(separator=' ', strip=True)
         if text:
+            if buf.tell():
+                buf.write('\n\n')
             # Clean up whitespace within the text
-            text = re.sub(r'\s+', ' ', text)
-            paragraphs.append(text)
+            buf.write(_WS_RE.sub(' ', text))
 
     # If no block elements found, fall back to body text
-    if not paragraphs:
+    if not buf.tell():
         body = soup.find('body')
         if body:
             text = body.get_text(separator='\n', strip=True)
-            paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
+            return '\n\n'.join(p.strip() for p in text.split('\n') if p.strip())
 
-    return '\n\n'.join(paragraphs)
+    return buf.getvalue()
 
 
 def get_spine_order(book: epub.EpubBook) -> List[str]:
@@ -90,9 +103,18 @@ def get_spine_order(book: epub.EpubBook) -> List[str]:
     return [id_to_href.get(sid, sid) for sid in spine_ids]
 
 
-def extract_epub(epub_path: str) -> str:
-    """Extract text from EPUB file with proper ordering and cleaning."""
-    book = epub.read_epub(epub_path, options={'ignore_ncx': True})
+def read_book(epub_path: str) -> epub.EpubBook:
+    """Read and decompress an EPUB; every item's content is loaded into memory."""
+    return epub.read_epub(epub_path, options={'ignore_ncx': True})
+
+
+def extract_epub(epub_path: str, book: Optional[epub.EpubBook] = None) -> str:
+    """Extract text from EPUB file with proper ordering and cleaning.
+
+    Pass an already loaded book to avoid reading the file again.
+    """
+    if book is None:
+        book = read_book(epub_path)
 
     # Get spine order for proper chapter sequencing
     spine_order = get_spine_order(book)
@@ -112,13 +134,13 @@ def extract_epub(epub_path: str) -> str:
             item = href_to_item[href]
             processed_hrefs.add(href)
 
-            soup = BeautifulSoup(item.get_content(), 'html.parser')
+            soup = BeautifulSoup(item.get_content(), 'lxml')
 
             # Skip navigation/TOC items
             if should_skip_item(item, soup):
                 continue
 
-            text = extract_text_from_html(item.get_content())
+            text = extract_text_from_soup(soup)
 
             # Skip very short content (likely cover pages, etc.)
             if len(text.strip()) > 100:
@@ -127,12 +149,12 @@ def extract_epub(epub_path: str) -> str:
     # Process any remaining items not in spine
     for item in book.get_items():
         if item.get_type() == ITEM_DOCUMENT and item.file_name not in processed_hrefs:
-            soup = BeautifulSoup(item.get_content(), 'html.parser')
+            soup = BeautifulSoup(item.get_content(), 'lxml')
 
             if should_skip_item(item, soup):
                 continue
 
-            text = extract_text_from_html(item.get_content())
+            text = extract_text_from_soup(soup)
 
             if len(text.strip()) > 100:
                 chapters.append(text)
@@ -141,9 +163,10 @@ def extract_epub(epub_path: str) -> str:
     return '\n\n'.join(chapters)
 
 
-def extract_metadata(epub_path: str) -> dict:
+def extract_metadata(epub_path: str, book: Optional[epub.EpubBook] = None) -> dict:
     """Extract metadata from EPUB for context."""
-    book = epub.read_epub(epub_path, options={'ignore_ncx': True})
+    if book is None:
+        book = read_book(epub_path)
 
     metadata = {
         'title': '',
@@ -179,8 +202,24 @@ def extract_metadata(epub_path: str) -> dict:
     return metadata
 
 
+def extract_file(epub_file: Path, output_path: Path) -> Tuple[int, int, str]:
+    """Extract and save a single EPUB (runs in a worker process).
+
+    Returns (char_count, paragraph_count, title) for the summary line.
+    """
+    book = read_book(str(epub_file))
+    text = extract_epub(str(epub_file), book)
+    metadata = extract_metadata(str(epub_file), book)
+
+    output_file = output_path / f"{epub_file.stem}.txt"
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(text)
+
+    return len(text), text.count('\n\n') + 1, metadata.get('title', '')
+
+
 def process_all_epubs(input_dir: str, output_dir: str):
-    """Process all EPUBs in directory"""
+    """Process all EPUBs in directory, one worker process per file"""
     input_path = Path(input_dir)
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
@@ -190,25 +229,20 @@ def process_all_epubs(input_dir: str, output_dir: str):
         print(f"No EPUB files found in {input_dir}")
         return
 
-    for epub_file in epub_files:
-        print(f"Processing: {epub_file.name}")
-
-        try:
-            text = extract_epub(str(epub_file))
-            metadata = extract_metadata(str(epub_file))
-
-            output_file = output_path / f"{epub_file.stem}.txt"
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(text)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {executor.submit(extract_file, epub_file, output_path): epub_file for epub_file in epub_files}
+        for future in as_completed(futures):
+            epub_file = futures[future]
+            print(f"Processing: {epub_file.name}")
 
-            char_count = len(text)
-            para_count = text.count('\n\n') + 1
-            print(f"  Saved: {char_count:,} chars, ~{para_count} paragraphs")
-            if metadata.get('title'):
-                print(f"  Title: {metadata['title'][:60]}")
+            try:
+                char_count, para_count, title = future.result()
+                print(f"  Saved: {char_count:,} chars, ~{para_count} paragraphs")
+                if title:
+                    print(f"  Title: {title[:60]}")
 
-        except Exception as e:
-            print(f"  ERROR: {e}")
+            except Exception as e:
+                print(f"  ERROR: {e}")
 
 
 if __name__ == "__main__":
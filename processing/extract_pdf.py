@@ -3,31 +3,66 @@ PDF Text Extraction Script
 Handles OCR'd and native PDFs with improved text quality.
 """
 
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Iterator, Tuple
 
 # pip install pymupdf
 import fitz
 
 
+# Compiled once at import
+_HYPHEN_RE = re.compile(r'(\w)-\s*\n\s*(\w)')
+# Quote and dash normalization plus control character removal, fused into one pass:
+# a matched character maps to its replacement, anything unlisted is dropped
+_PUNCT_REPLACEMENTS = {
+    '“': '"', '”': '"', '„': '"', '‟': '"',
+    '‘': "'", '’': "'", '‚': "'", '‛': "'",
+    '—': '-', '–': '-',
+}
+_PUNCT_CTRL_RE = re.compile('[' + ''.join(_PUNCT_REPLACEMENTS) + r'\x00-\x08\x0b\x0c\x0e-\x1f]')
+_WS_RE = re.compile(r'[ \t]+')
+# Headers and footers, as the whole content of a line once its edge whitespace is stripped
+HEADER_FOOTER_PATTERNS = [
+    r'\S{0,2}',  # Empty or very short lines
+    r'\d{1,4}',  # Just a page number
+    r'[-—]\s*\d+\s*[-—]',  # Page number with dashes
+    # Common header patterns
+    r'C\.?\s*G\.?\s*JUNG',
+    r'CARL\s+(GUSTAV\s+)?JUNG',
+    r'THE\s+COLLECTED\s+WORKS.*',
+    r'VOLUME\s+[IVXLCDM\d]+',
+    r'BOLLINGEN\s+SERIES.*',
+]
+# One pass deletes every header/footer line of a page together with its line break;
+# \s becomes [^\S\n] so no pattern can reach across lines
+_HEADER_FOOTER_LINE_RE = re.compile(
+    r'(?m)^[^\S\n]*(?:' + '|'.join(p.replace(r'\s', r'[^\S\n]') for p in HEADER_FOOTER_PATTERNS) + r')[^\S\n]*$\n?',
+    re.IGNORECASE,
+)
+_CHAPTER_RE = re.compile(r'^(CHAPTER|PART|SECTION|LECTURE)\s+[IVXLCDM\d]+', re.IGNORECASE)
+# Every first character _CHAPTER_RE can match (the long s folds to s), checked before the regex
+_CHAPTER_INITIALS = frozenset('CLPSclpsſ')
+# Default text extraction flags, plus rejoining words hyphenated at line ends within a
+# block; breaks across blocks and pages are still left to _HYPHEN_RE
+_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT | fitz.TEXT_DEHYPHENATE
+# A word broken by a hyphen at the end of the buffered text, which the next page may finish
+_TRAILING_HYPHEN_RE = re.compile(r'\w-\s*\Z')
+
+
 def clean_extracted_text(text: str) -> str:
     """Clean up common PDF extraction artifacts."""
     # Fix hyphenation at line breaks
-    text = re.sub(r'(\w)-\s*\n\s*(\w)', r'\1\2', text)
-
-    # Normalize quotes
-    text = re.sub(r'["""]', '"', text)
-    text = re.sub(r"[''']", "'", text)
-
-    # Normalize dashes
-    text = re.sub(r'—|–', '-', text)
+    text = _HYPHEN_RE.sub(r'\1\2', text)
 
-    # Remove form feed and other control characters
-    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', text)
+    # Normalize quotes and dashes, remove form feed and other control characters
+    text = _PUNCT_CTRL_RE.sub(lambda m: _PUNCT_REPLACEMENTS.get(m.group(), ''), text)
 
     # Normalize whitespace within lines (but preserve newlines)
-    text = re.sub(r'[ \t]+', ' ', text)
+    text = _WS_RE.sub(' ', text)
 
     # Clean up lines that are just whitespace
     lines = text.split('\n')
@@ -37,43 +72,18 @@ def clean_extracted_text(text: str) -> str:
     return text
 
 
-def is_header_footer(line: str, page_num: int, total_pages: int) -> bool:
-    """Check if a line is likely a header or footer."""
-    stripped = line.strip()
+def merge_paragraphs(lines: list) -> Tuple[str, int]:
+    """Merge lines into paragraphs based on content analysis.
 
-    # Empty or very short lines
-    if len(stripped) < 3:
-        return True
-
-    # Just a page number
-    if re.match(r'^\d{1,4}$', stripped):
-        return True
-
-    # Page number with dashes
-    if re.match(r'^[-—]\s*\d+\s*[-—]$', stripped):
-        return True
-
-    # Common header patterns
-    header_patterns = [
-        r'^C\.?\s*G\.?\s*JUNG$',
-        r'^CARL\s+(GUSTAV\s+)?JUNG$',
-        r'^THE\s+COLLECTED\s+WORKS',
-        r'^VOLUME\s+[IVXLCDM\d]+$',
-        r'^BOLLINGEN\s+SERIES',
-    ]
-    if any(re.match(p, stripped, re.IGNORECASE) for p in header_patterns):
-        return True
-
-    return False
-
-
-def merge_paragraphs(lines: list) -> str:
-    """Merge lines into paragraphs based on content analysis."""
+    Returns the paragraphs joined by blank lines, and how many there are.
+    """
     if not lines:
-        return ""
+        return "", 0
 
     paragraphs = []
     current_para = []
+    # Last character of current_para, so sentence ends need no re-join of the buffer
+    last_char = ''
 
     for line in lines:
         stripped = line.strip()
@@ -85,109 +95,126 @@ def merge_paragraphs(lines: list) -> str:
                 current_para = []
             continue
 
-        # Check if this line starts a new paragraph
-        starts_new = False
-
-        # Starts with capital letter after period suggests new paragraph
-        if current_para:
-            prev_text = ' '.join(current_para)
-            if prev_text.rstrip().endswith(('.', '!', '?', ':', '"')):
-                if stripped[0].isupper():
-                    starts_new = True
-
-        # Indentation or special markers
-        if line.startswith('   ') or line.startswith('\t'):
-            starts_new = True
-
-        # Chapter/section headers
-        if re.match(r'^(CHAPTER|PART|SECTION|LECTURE)\s+[IVXLCDM\d]+', stripped, re.IGNORECASE):
-            starts_new = True
-
-        if starts_new and current_para:
+        # Check if this line starts a new paragraph; the checks short-circuit, cheapest first
+        if current_para and (
+            # Starts with capital letter after period suggests new paragraph
+            (last_char in '.!?:"' and stripped[0].isupper())
+            # Indentation or special markers
+            or line.startswith(('   ', '\t'))
+            # Chapter/section headers
+            or (stripped[0] in _CHAPTER_INITIALS and _CHAPTER_RE.match(stripped))
+        ):
             paragraphs.append(' '.join(current_para))
             current_para = []
 
         current_para.append(stripped)
+        last_char = stripped[-1]
 
     # Don't forget the last paragraph
     if current_para:
         paragraphs.append(' '.join(current_para))
 
-    return '\n\n'.join(paragraphs)
-
-
-def extract_pdf_pymupdf(pdf_path: str) -> str:
-    """Extract text from PDF using PyMuPDF with improved quality."""
-    doc = fitz.open(pdf_path)
-    total_pages = len(doc)
-
-    all_lines = []
-
-    for page_num, page in enumerate(doc):
-        # Extract text blocks (preserves reading order better)
-        blocks = page.get_text("blocks")
-
-        page_lines = []
-        for block in blocks:
-            if block[6] == 0:  # Text block (not image)
-                text = block[4]
-                lines = text.split('\n')
-
-                for line in lines:
-                    # Filter out headers/footers
-                    if not is_header_footer(line, page_num, total_pages):
-                        page_lines.append(line)
-
-        all_lines.extend(page_lines)
-
-        # Add a marker between pages to help with paragraph detection
-        all_lines.append('')
-
-    doc.close()
-
-    # Clean the extracted text
-    raw_text = '\n'.join(all_lines)
-    text = clean_extracted_text(raw_text)
-
-    # Merge into proper paragraphs
-    lines = text.split('\n')
-    text = merge_paragraphs(lines)
-
-    # Final cleanup
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = text.strip()
-
-    return text
+    return '\n\n'.join(paragraphs), len(paragraphs)
+
+
+def iter_pdf_text(pdf_path: str) -> Iterator[Tuple[str, int]]:
+    """Extract text from PDF page by page, yielding merged paragraphs as they are ready.
+
+    Yields (text, paragraph_count) pairs; joining the texts with blank lines gives
+    the full text. Only pages whose last word is hyphenated across the page break
+    are held back, so memory use stays at roughly one page.
+    """
+    with fitz.open(pdf_path) as doc:
+        pending = ''
+        for page in doc:
+            # Text blocks in content order, joined by MuPDF (image blocks excluded)
+            text = page.get_text("text", flags=_TEXT_FLAGS)
+
+            # Filter out headers/footers
+            text = _HEADER_FOOTER_LINE_RE.sub('', text)
+            if text and not text.endswith('\n'):
+                text += '\n'
+
+            # A blank line between pages helps with paragraph detection
+            pending += text + '\n'
+
+            # The hyphenation fix joins across blank lines, so carry a broken word over
+            if _TRAILING_HYPHEN_RE.match(pending, max(len(pending.rstrip()) - 2, 0)):
+                continue
+
+            # Paragraphs never continue past the blank line, so the text so far is final
+            text, count = merge_paragraphs(clean_extracted_text(pending).split('\n'))
+            pending = ''
+            if text:
+                yield text, count
+
+    if pending:
+        text, count = merge_paragraphs(clean_extracted_text(pending).split('\n'))
+        if text:
+            yield text, count
+
+
+def extract_pdf_pymupdf(pdf_path: str) -> Tuple[str, int]:
+    """Extract text from PDF using PyMuPDF with improved quality.
+
+    Returns (text, paragraph_count).
+    """
+    pieces = []
+    para_count = 0
+    for text, count in iter_pdf_text(pdf_path):
+        pieces.append(text)
+        para_count += count
+    return '\n\n'.join(pieces), para_count
+
+
+def extract_file(pdf_file: Path, output_path: Path) -> Tuple[int, int]:
+    """Extract and save a single PDF (runs in a worker process).
+
+    Returns (char_count, paragraph_count) for the summary line.
+    """
+    # Save extracted text as it is produced, via a temp file so a failed
+    # extraction never leaves a partial output behind
+    output_file = output_path / f"{pdf_file.stem}.txt"
+    tmp_file = output_file.with_name(output_file.name + ".tmp")
+    char_count = 0
+    para_count = 0
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        for text, count in iter_pdf_text(str(pdf_file)):
+            if char_count:
+                f.write('\n\n')
+                char_count += 2
+            f.write(text)
+            char_count += len(text)
+            para_count += count
+    os.replace(tmp_file, output_file)
+
+    return char_count, para_count or 1
 
 
 def process_all_pdfs(input_dir: str, output_dir: str):
-    """Process all PDFs in directory"""
+    """Process all PDFs in directory, one worker process per file"""
     input_path = Path(input_dir)
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
-    pdf_files = list(input_path.glob("*.pdf"))
+    # Largest files first, so the longest extractions start early and small ones fill the tail
+    pdf_files = sorted(input_path.glob("*.pdf"), key=lambda p: p.stat().st_size, reverse=True)
     if not pdf_files:
         print(f"No PDF files found in {input_dir}")
         return
 
-    for pdf_file in pdf_files:
-        print(f"Processing: {pdf_file.name}")
-
-        try:
-            text = extract_pdf_pymupdf(str(pdf_file))
-
-            # Save extracted text
-            output_file = output_path / f"{pdf_file.stem}.txt"
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(text)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {executor.submit(extract_file, pdf_file, output_path): pdf_file for pdf_file in pdf_files}
+        for future in as_completed(futures):
+            pdf_file = futures[future]
+            print(f"Processing: {pdf_file.name}")
 
-            char_count = len(text)
-            para_count = text.count('\n\n') + 1
-            print(f"  Saved: {char_count:,} chars, ~{para_count} paragraphs")
+            try:
+                char_count, para_count = future.result()
+                print(f"  Saved: {char_count:,} chars, ~{para_count} paragraphs")
 
-        except Exception as e:
-            print(f"  ERROR: {e}")
+            except Exception as e:
+                print(f"  ERROR: {e}")
 
 
 if __name__ == "__main__":
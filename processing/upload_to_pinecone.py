@@ -2,10 +2,20 @@
 
 import os
 import sys
-import json
 import time
-import requests
-from pathlib import Path
+import random
+import asyncio
+import hashlib
+import sqlite3
+import struct
+import httpx
+import ijson
+import orjson
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from typing import Iterator
 from dotenv import load_dotenv
 from pinecone import Pinecone, ServerlessSpec
 
@@ -22,32 +32,68 @@ EMBEDDING_MODEL = "multilingual-e5-large"
 EMBEDDING_DIMS = 1024
 BATCH_SIZE = 50  # Reduced to avoid rate limits
 MAX_RETRIES = 5
+MAX_CONCURRENT_BATCHES = 4  # Embedding requests in flight at once
+MAX_QUEUED_BATCHES = 2 * MAX_CONCURRENT_BATCHES  # Batches read ahead of the upload
+MAX_PENDING_UPSERTS = 4  # Embedded batches waiting for the upsert writer
+REQUEST_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+EMBED_CACHE_PATH = os.environ.get("EMBED_CACHE_PATH", "embed_cache.sqlite3")
+# The chat API reads each match's text from metadata. Set PINECONE_STORE_TEXT=0 to upload
+# only source_file/start_char/end_char (far smaller upserts) for a reader that slices the
+# text from the cleaned source files instead; the slice differs from the chunk text only
+# in the spacing between sentences and paragraphs.
+STORE_TEXT = os.environ.get("PINECONE_STORE_TEXT", "1") != "0"
+# Cached vectors are stored as packed little-endian float16: half the size of float32, and
+# the rounding error (under 0.1% per component) is negligible for cosine similarity.
+# Caches written as float32 are still read, told apart by their byte length.
+_VECTOR_STRUCT = struct.Struct(f"<{EMBEDDING_DIMS}e")
+_CACHED_VECTOR_STRUCTS = {s.size: s for s in (_VECTOR_STRUCT, struct.Struct(f"<{EMBEDDING_DIMS}f"))}
 
 
-def generate_embeddings(texts: list, retry_count: int = 0) -> list:
-    """Generate embeddings using Pinecone's inference API with retry logic."""
-    response = requests.post(
-        "https://api.pinecone.io/embed",
-        headers={
-            "Api-Key": PINECONE_API_KEY,
-            "Content-Type": "application/json",
-            "X-Pinecone-API-Version": "2024-10",
-        },
-        json={
-            "model": EMBEDDING_MODEL,
-            "inputs": [{"text": t} for t in texts],
-            "parameters": {"input_type": "passage", "truncate": "END"},
-        },
-    )
-    if response.status_code == 429 and retry_count < MAX_RETRIES:
-        # Rate limited - exponential backoff
+def retry_delay(response: httpx.Response, retry_count: int) -> float:
+    """Seconds to wait before retrying a rate-limited request.
+
+    Honors the server's Retry-After (seconds or an HTTP date) and falls back to
+    exponential backoff; up to 10% jitter keeps concurrent batches from retrying in step.
+    """
+    wait_time = None
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            wait_time = float(retry_after)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                if retry_at.tzinfo is None:
+                    retry_at = retry_at.replace(tzinfo=timezone.utc)
+                wait_time = (retry_at - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                pass
+    if wait_time is None:
         wait_time = 2 ** retry_count * 5  # 5, 10, 20, 40, 80 seconds
-        print(f"  Rate limited, waiting {wait_time}s (retry {retry_count + 1}/{MAX_RETRIES})")
-        time.sleep(wait_time)
-        return generate_embeddings(texts, retry_count + 1)
-    if not response.ok:
+    wait_time = max(wait_time, 0.0)
+    return wait_time + random.uniform(0, wait_time * 0.1)
+
+
+async def generate_embeddings(client: httpx.AsyncClient, texts: list) -> list:
+    """Generate embeddings using Pinecone's inference API with retry logic."""
+    for retry_count in range(MAX_RETRIES + 1):
+        response = await client.post(
+            "https://api.pinecone.io/embed",
+            content=orjson.dumps({
+                "model": EMBEDDING_MODEL,
+                "inputs": [{"text": t} for t in texts],
+                "parameters": {"input_type": "passage", "truncate": "END"},
+            }),
+        )
+        if response.status_code != 429 or retry_count == MAX_RETRIES:
+            break
+        # Rate limited - wait as long as the server asks, or back off exponentially
+        wait_time = retry_delay(response, retry_count)
+        print(f"  Rate limited, waiting {wait_time:.1f}s (retry {retry_count + 1}/{MAX_RETRIES})")
+        await asyncio.sleep(wait_time)
+    if not response.is_success:
         raise Exception(f"Embedding API error: {response.status_code} - {response.text}")
-    return [item["values"] for item in response.json()["data"]]
+    return [item["values"] for item in orjson.loads(response.content)["data"]]
 
 
 def init_pinecone():
@@ -75,20 +121,22 @@ def prepare_vectors(chunks: list, embeddings: list) -> list:
     vectors = []
     for chunk, emb in zip(chunks, embeddings):
         metadata = {
-            "text": chunk["text"][:8000],  # Truncate if needed
             "source_file": chunk["source_file"],
             "work_title": chunk.get("work_title", "Unknown"),
             "chunk_index": chunk["chunk_index"],
             "total_chunks": chunk["total_chunks"],
         }
 
+        if STORE_TEXT:
+            metadata["text"] = chunk["text"][:8000]  # Truncate if needed (a shorter text is returned as is)
+
         # Add optional metadata
-        if chunk.get("chapter"):
-            metadata["chapter"] = chunk["chapter"][:200]
-        if chunk.get("start_char") is not None:
-            metadata["start_char"] = chunk["start_char"]
-        if chunk.get("end_char") is not None:
-            metadata["end_char"] = chunk["end_char"]
+        if chapter := chunk.get("chapter"):
+            metadata["chapter"] = chapter[:200]
+        if (start_char := chunk.get("start_char")) is not None:
+            metadata["start_char"] = start_char
+        if (end_char := chunk.get("end_char")) is not None:
+            metadata["end_char"] = end_char
 
         vectors.append({
             "id": chunk["id"],
@@ -98,31 +146,192 @@ def prepare_vectors(chunks: list, embeddings: list) -> list:
     return vectors
 
 
-def upload_chunks(chunks_file: str):
-    """Upload chunks to Pinecone with full metadata."""
-    chunks = json.loads(Path(chunks_file).read_text())
-    print(f"Loaded {len(chunks)} chunks from {chunks_file}")
+def iter_chunks(chunks_file: str) -> Iterator[dict]:
+    """Stream chunks from the chunks JSON array without loading the whole file."""
+    with open(chunks_file, "rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
+
+def iter_batches(chunks_file: str) -> Iterator[list]:
+    """Group streamed chunks into upload batches of BATCH_SIZE."""
+    chunks = iter_chunks(chunks_file)
+    while batch := list(islice(chunks, BATCH_SIZE)):
+        yield batch
+
+
+def text_key(text: str) -> bytes:
+    """Compact digest identifying a chunk text."""
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """Embeddings already paid for, kept on disk so an interrupted upload resumes for free."""
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path)
+        # Pages that fit several float16 vectors; the default 4 KiB holds only one (new files only)
+        self.db.execute("PRAGMA page_size = 16384")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(model TEXT NOT NULL, key BLOB NOT NULL, vector BLOB NOT NULL, PRIMARY KEY (model, key))"
+        )
+
+    def load(self, keys: list) -> dict:
+        """Cached vectors for whichever of the text keys have one."""
+        rows = self.db.execute(
+            f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(keys))})",
+            [EMBEDDING_MODEL, *keys],
+        )
+        return {key: list(_CACHED_VECTOR_STRUCTS[len(vector)].unpack(vector)) for key, vector in rows}
+
+    def save(self, keys: list, vectors: list):
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector) VALUES (?, ?, ?)",
+                [(EMBEDDING_MODEL, key, _VECTOR_STRUCT.pack(*vector)) for key, vector in zip(keys, vectors)],
+            )
+
+    def close(self):
+        self.db.close()
 
-    if not chunks:
+
+class SharedEmbeddings:
+    """Embeds each distinct text once per upload and shares the vector with every repeat.
+
+    Texts embedded by an earlier run come from the cache. Otherwise the first batch
+    containing a text requests it and later batches await that same request. A
+    vector is dropped once its last occurrence has been served, so only repeated
+    texts still ahead in the upload are kept in memory.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, cache: EmbeddingCache,
+                 text_counts: Counter):
+        self.client = client
+        self.semaphore = semaphore
+        self.cache = cache
+        self.uses = text_counts
+        self.pending = {}  # text key -> (embedding task or future, position in its result)
+        self.cache_hits = 0
+
+    async def embed(self, texts: list) -> list:
+        keys = [text_key(t) for t in texts]
+        new = {}
+        for key, text in zip(keys, texts):
+            if key not in self.pending and key not in new:
+                new[key] = text
+        cached = self.cache.load(list(new)) if new else {}
+        if cached:
+            self.cache_hits += len(cached)
+            done = asyncio.get_running_loop().create_future()
+            done.set_result(list(cached.values()))
+            for i, key in enumerate(cached):
+                self.pending[key] = (done, i)
+            new = {key: text for key, text in new.items() if key not in cached}
+        if new:
+            task = asyncio.create_task(self._request(new))
+            for i, key in enumerate(new):
+                self.pending[key] = (task, i)
+
+        lookups = [self.pending[key] for key in keys]
+        try:
+            # Wait for every request involved, so no failure goes unretrieved
+            await asyncio.gather(*{task for task, _ in lookups}, return_exceptions=True)
+            return [task.result()[i] for task, i in lookups]
+        finally:
+            for key in keys:
+                self.uses[key] -= 1
+                if not self.uses[key]:
+                    self.pending.pop(key, None)
+
+    async def _request(self, new: dict) -> list:
+        try:
+            async with self.semaphore:
+                embeddings = await generate_embeddings(self.client, list(new.values()))
+        except Exception:
+            # Later batches repeating these texts request them again rather than share the failure
+            task = asyncio.current_task()
+            for key in new:
+                if self.pending.get(key, (None,))[0] is task:
+                    del self.pending[key]
+            raise
+        self.cache.save(list(new), embeddings)
+        return embeddings
+
+
+async def upload_batch(embeddings: SharedEmbeddings, upserts: asyncio.Queue, batch: list, batch_num: int, total_batches: int):
+    """Embed one batch and hand its vectors to the upsert writer."""
+    try:
+        vectors = prepare_vectors(batch, await embeddings.embed([c["text"] for c in batch]))
+    except Exception as e:
+        print(f"Batch {batch_num}/{total_batches}: ERROR: {e}")
         return
+    # Waits while the writer is MAX_PENDING_UPSERTS batches behind
+    await upserts.put((batch_num, vectors))
 
-    index = init_pinecone()
-    total_batches = (len(chunks) - 1) // BATCH_SIZE + 1
 
-    for i in range(0, len(chunks), BATCH_SIZE):
-        batch = chunks[i:i + BATCH_SIZE]
-        batch_num = i // BATCH_SIZE + 1
-        print(f"Batch {batch_num}/{total_batches} ({len(batch)} chunks)")
+async def upsert_writer(index, upserts: asyncio.Queue, total_batches: int):
+    """Upsert queued batches one at a time, off the event loop, until a None arrives.
 
+    A single writer keeps embedding requests flowing while upserts are in flight,
+    without several threads calling the Pinecone client at once.
+    """
+    while (item := await upserts.get()) is not None:
+        batch_num, vectors = item
         try:
-            embeddings = generate_embeddings([c["text"] for c in batch])
-            vectors = prepare_vectors(batch, embeddings)
-            index.upsert(vectors=vectors)
-            print(f"  Uploaded {len(vectors)} vectors")
+            await asyncio.to_thread(index.upsert, vectors=vectors)
+            print(f"Batch {batch_num}/{total_batches}: uploaded {len(vectors)} vectors")
         except Exception as e:
-            print(f"  ERROR: {e}")
+            print(f"Batch {batch_num}/{total_batches}: ERROR: {e}")
 
-        time.sleep(1.5)  # Longer delay to avoid rate limits
+
+async def upload_batches(index, chunks_file: str, text_counts: Counter, cache: EmbeddingCache):
+    """Upload all batches, keeping up to MAX_CONCURRENT_BATCHES embedding requests in flight."""
+    total_batches = (sum(text_counts.values()) - 1) // BATCH_SIZE + 1
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+
+    # One HTTP/2 connection, multiplexed across the concurrent batches
+    async with httpx.AsyncClient(
+        http2=True,
+        headers={
+            "Api-Key": PINECONE_API_KEY,
+            "Content-Type": "application/json",
+            "X-Pinecone-API-Version": "2024-10",
+        },
+        timeout=REQUEST_TIMEOUT,
+    ) as client:
+        embeddings = SharedEmbeddings(client, semaphore, cache, text_counts)
+        upserts = asyncio.Queue(maxsize=MAX_PENDING_UPSERTS)
+        writer = asyncio.create_task(upsert_writer(index, upserts, total_batches))
+        queued = set()
+        for batch_num, batch in enumerate(iter_batches(chunks_file), 1):
+            # Read further into the file only as batches finish
+            if len(queued) >= MAX_QUEUED_BATCHES:
+                _, queued = await asyncio.wait(queued, return_when=asyncio.FIRST_COMPLETED)
+            queued.add(asyncio.create_task(upload_batch(embeddings, upserts, batch, batch_num, total_batches)))
+        await asyncio.gather(*queued)
+        await upserts.put(None)
+        await writer
+
+    if embeddings.cache_hits:
+        print(f"Reused {embeddings.cache_hits} cached embeddings")
+
+
+def upload_chunks(chunks_file: str):
+    """Upload chunks to Pinecone with full metadata."""
+    # A first streaming pass counts chunks and repeated texts; only the text digests are kept
+    text_counts = Counter(text_key(c["text"]) for c in iter_chunks(chunks_file))
+    total_chunks = sum(text_counts.values())
+    print(f"Loaded {total_chunks} chunks from {chunks_file}")
+
+    if not total_chunks:
+        return
+
+    index = init_pinecone()
+    cache = EmbeddingCache(EMBED_CACHE_PATH)
+    try:
+        asyncio.run(upload_batches(index, chunks_file, text_counts, cache))
+    finally:
+        cache.close()
 
     print(f"\nUpload complete!")
     print(f"Index stats: {index.describe_index_stats()}")